@@ -0,0 +1,206 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+
+from climbing_history import parsing
+from climbing_history.ifsc.ifsc_parsing import BACKENDS as IFSC_BACKENDS, parse_ifsc_results
+
+# recorded pages, fixtures/index.json maps every file to the url it was recorded from. The committed
+# set is small (5 pages per kind, 3 IFSC pages) so the benchmark runs on a fresh checkout,
+# --record replaces it with pages from a crawl's page cache
+FIXTURES_DIR = os.path.join(HERE, 'fixtures')
+# one json line per benchmark run, so throughput changes show up between versions, only runs
+# over the same fixtures (same fixtures hash) are compared
+HISTORY_PATH = os.path.join(HERE, 'history.jsonl')
+PAGES_PER_KIND = 25 # pages recorded per kind of page
+MIN_SECONDS = 1.0 # every extractor runs over its pages for at least this long
+
+
+def page_kind(url):
+    if "climbing-history.org/climbs?page=" in url:
+        return 'listing'
+    if "climbing-history.org/climb/" in url:
+        return 'climb'
+    if "climbing-history.org" in url:
+        return 'crag'
+    return 'external' # UKC map pages, 8a.nu
+
+
+####################
+# recording
+####################
+
+def record_fixtures(cache_dir, ifsc_archive=None, fixtures_dir=FIXTURES_DIR, per_kind=PAGES_PER_KIND):
+    """Copy up to per_kind pages of every kind out of the page cache (and the IFSC page archive)"""
+    from climbing_history.page_cache import PageCache
+    pages = {}
+    cache = PageCache(cache_dir)
+    for url in cache.urls():
+        kind = page_kind(url)
+        if len(pages.setdefault(kind, [])) < per_kind:
+            cached = cache.get(url, ttl=float('inf'))
+            if cached is not None and cached[0] == 200:
+                pages[kind].append((url, cached[1]))
+    cache.close()
+    if ifsc_archive:
+        from climbing_history.ifsc.page_archive import PageArchive
+        archive = PageArchive(ifsc_archive)
+        pages['ifsc'] = [(url, archive.get(url)) for url in archive.urls()[:per_kind]]
+        archive.close()
+
+    index = {}
+    for kind, kind_pages in pages.items():
+        os.makedirs(os.path.join(fixtures_dir, kind), exist_ok=True)
+        for i, (url, html) in enumerate(kind_pages):
+            name = f"{kind}/{i:03d}.html"
+            with open(os.path.join(fixtures_dir, name), 'w', encoding='utf-8') as file:
+                file.write(html)
+            index[name] = url
+    with open(os.path.join(fixtures_dir, 'index.json'), 'w', encoding='utf-8') as file:
+        json.dump(index, file, indent=1)
+    return {kind: len(kind_pages) for kind, kind_pages in pages.items()}
+
+
+def load_fixtures(fixtures_dir=FIXTURES_DIR):
+    """{kind: [(url, html)]} of the recorded pages"""
+    with open(os.path.join(fixtures_dir, 'index.json'), 'r', encoding='utf-8') as file:
+        index = json.load(file)
+    fixtures = {}
+    for name, url in sorted(index.items()):
+        with open(os.path.join(fixtures_dir, name), 'r', encoding='utf-8') as file:
+            fixtures.setdefault(name.split('/')[0], []).append((url, file.read()))
+    return fixtures
+
+
+def fixtures_hash(fixtures):
+    """Hash of the recorded pages' urls and contents, runs are only compared when it's the same"""
+    digest = hashlib.sha256()
+    for kind, pages in sorted(fixtures.items()):
+        for url, html in pages:
+            digest.update(url.encode('utf-8') + b'\0' + html.encode('utf-8') + b'\0')
+    return digest.hexdigest()[:16]
+
+
+####################
+# benchmark
+####################
+
+def benchmark_cases(fixtures):
+    """(kind, extractor, backend, pages, run) for every extractor that applies to the fixtures"""
+    cases = []
+    for kind, pages in sorted(fixtures.items()):
+        if kind == 'ifsc':
+            for backend in IFSC_BACKENDS:
+                cases.append((kind, 'ifsc_results', backend, pages,
+                              lambda url, html, backend=backend: parse_ifsc_results(html, backend)))
+            continue
+        for extractor in parsing.extractors_for_url(pages[0][0]):
+            for backend in parsing.BACKENDS:
+                cases.append((kind, extractor, backend, pages,
+                              lambda url, html, extractor=extractor, backend=backend:
+                              parsing.extractors_for_url(url)[extractor](html, backend)))
+    return cases
+
+
+def measure(pages, run, min_seconds=MIN_SECONDS):
+    """(pages per second, peak traced memory in bytes of one pass over the pages)"""
+    tracemalloc.start()
+    for url, html in pages:
+        run(url, html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    done = 0
+    start = time.perf_counter()
+    while True:
+        for url, html in pages:
+            run(url, html)
+        done += len(pages)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return done / elapsed, peak
+
+
+def run_benchmarks(fixtures, min_seconds=MIN_SECONDS):
+    results = []
+    for kind, extractor, backend, pages, run in benchmark_cases(fixtures):
+        pages_per_second, peak = measure(pages, run, min_seconds)
+        results.append({'kind': kind, 'extractor': extractor, 'backend': backend, 'pages': len(pages),
+                        'pages_per_second': round(pages_per_second, 1), 'peak_bytes': peak})
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def append_history(results, fixtures, path=HISTORY_PATH):
+    """Add a run to the history file, returns the last previous run over the same fixtures (None if there's none)"""
+    digest = fixtures_hash(fixtures)
+    previous = None
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            runs = [json.loads(line) for line in file.read().splitlines() if line.strip()]
+        # throughput over different pages isn't comparable, older runs without a hash neither
+        same_fixtures = [run for run in runs if run.get('fixtures_hash') == digest]
+        previous = same_fixtures[-1] if same_fixtures else None
+        if runs and previous is None:
+            print(f"No previous run over these fixtures ({digest}), not comparing")
+    run = {'time': datetime.datetime.now().isoformat(timespec='seconds'), 'commit': _git_commit(),
+           'python': platform.python_version(), 'fixtures_hash': digest,
+           'pages': sum(len(pages) for pages in fixtures.values()), 'results': results}
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(run) + "\n")
+    return previous
+
+
+def print_results(results, previous=None):
+    before = {}
+    if previous is not None:
+        before = {(r['kind'], r['extractor'], r['backend']): r['pages_per_second'] for r in previous['results']}
+    print(f"{'kind':<10}{'extractor':<15}{'backend':<8}{'pages/s':>10}{'peak KiB':>10}{'change':>9}")
+    for r in results:
+        old = before.get((r['kind'], r['extractor'], r['backend']))
+        change = f"{r['pages_per_second'] / old - 1:+.0%}" if old else ""
+        print(f"{r['kind']:<10}{r['extractor']:<15}{r['backend']:<8}{r['pages_per_second']:>10.1f}"
+              f"{r['peak_bytes'] / 1024:>10.0f}{change:>9}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Offline throughput benchmark of the page extractors")
+    arg_parser.add_argument('--record', metavar='CACHE_DIR',
+                            help="record the fixtures from this page cache (e.g. the crawler's CACHE_DIR) first")
+    arg_parser.add_argument('--ifsc-archive', metavar='PATH', help="also record IFSC pages from this page archive")
+    arg_parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    arg_parser.add_argument('--history', default=HISTORY_PATH)
+    arg_parser.add_argument('--min-seconds', type=float, default=MIN_SECONDS)
+    args = arg_parser.parse_args()
+
+    if args.record:
+        counts = record_fixtures(args.record, args.ifsc_archive, args.fixtures)
+        print(f"Recorded fixtures: {counts}")
+    if not os.path.exists(os.path.join(args.fixtures, 'index.json')):
+        raise SystemExit(f"No fixtures in {args.fixtures}, record them with --record CACHE_DIR")
+
+    fixtures = load_fixtures(args.fixtures)
+    results = run_benchmarks(fixtures, args.min_seconds)
+    previous = append_history(results, fixtures, args.history)
+    print_results(results, previous)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import aiohttp
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+
+from climbing_history import crawler
+from climbing_history.location_resolver import LocationResolver, domain_of
+from replay_server import add_server_arguments, recorded_url, replay_path, server_from_args
+
+CONCURRENCY_LEVELS = [5, 10, 20, 40]
+
+
+async def _timed_fetches(urls, concurrency):
+    """Fetch the urls like the crawler does, returns the (seconds, status or None if it gave up) of each"""
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency)
+    timeout = aiohttp.ClientTimeout(sock_connect=crawler.TIMEOUT, sock_read=crawler.TIMEOUT)
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = [None] * len(urls)
+    todo = list(enumerate(urls))
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        # concurrency workers, so the timings don't include waiting for a free slot
+        async def worker():
+            while todo:
+                i, url = todo.pop()
+                start = time.perf_counter()
+                try:
+                    status, _ = await crawler.fetch_text(session, url, semaphore)
+                except crawler.CrawlError:
+                    status = None
+                timings[i] = (time.perf_counter() - start, status)
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return timings
+
+
+def fetch_load(urls, concurrency):
+    """Throughput and latency percentiles of fetching the urls (with the crawler's retries) at a concurrency"""
+    start = time.perf_counter()
+    timings = asyncio.run(_timed_fetches(urls, concurrency))
+    elapsed = time.perf_counter() - start
+    latencies = np.array([seconds for seconds, _ in timings])
+    statuses = [status for _, status in timings]
+    return {
+        'concurrency': concurrency,
+        'pages_per_second': len(urls) / elapsed,
+        'p50': np.percentile(latencies, 50),
+        'p95': np.percentile(latencies, 95),
+        'p99': np.percentile(latencies, 99),
+        'ok': statuses.count(200),
+        'failed': statuses.count(None),
+        'other': len(statuses) - statuses.count(200) - statuses.count(None),
+    }
+
+
+class ReplayParser:
+    """A scraper's parse(url, status, text), handed the url each replayed page was recorded from.
+
+    The scrapers cut their site's base url off the urls (url[len(base_url):]), which would mangle
+    the replay server's http://127.0.0.1:PORT urls. Picklable, so it also runs in the parser processes.
+    """
+
+    def __init__(self, parse, base_url):
+        self.parse = parse
+        self.base_url = base_url
+
+    def __call__(self, url, status, text):
+        return self.parse(recorded_url(url[len(self.base_url):]), status, text)
+
+
+class ReplayLocationResolver(LocationResolver):
+    """LocationResolver fetching the UKC and 8a.nu pages from the replay server.
+
+    The links keep their recorded urls, the resolver picks the source by their domain.
+    """
+
+    def __init__(self, base_url, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.base_url = base_url
+
+    async def _get(self, url):
+        return await super()._get(self.base_url + replay_path(url))
+
+
+def _load_result(scraper, items, start, missed):
+    return {'scraper': scraper, 'items': items, 'per_second': items / (time.perf_counter() - start), 'missed': missed}
+
+
+def pipeline_load(base_url, paths, concurrency, workers, max_climbs=None):
+    """Throughput of the scrapers over the replayed pages, one result per stage.
+
+    The listing and climb pages of scrape_climbing_history.py, then the stages of
+    scrape_route_locations.py: the climb titles, the crags (resolve_crags) and the routes'
+    locations (LocationResolver, the UKC and 8a.nu pages served by the replay server too).
+    missed counts the pages that couldn't be fetched, the routes left without a location.
+    """
+    from climbing_history.crag_locations import resolve_crags
+    from climbing_history.scrape_climbing_history import parse_climb_response, parse_listing_response
+    from climbing_history.scrape_route_locations import parse_title_response
+
+    def crawl_load(scraper, urls, parse, write=None):
+        start = time.perf_counter()
+        _, skipped_urls = crawler.crawl(urls, ReplayParser(parse, base_url), write=write,
+                                        concurrency=concurrency, workers=workers)
+        results.append(_load_result(scraper, len(urls), start, len(skipped_urls)))
+
+    results = []
+    listing_urls = [base_url + path for path in paths if path.startswith('/climbs?page=')]
+    climb_urls = [base_url + path for path in paths if path.startswith('/climb/')][:max_climbs]
+    crawl_load('listing', listing_urls, parse_listing_response)
+    crawl_load('climbs', climb_urls, parse_climb_response)
+
+    # the crag links point at the recorded site, resolve_crags fetches them from the replay server
+    climb_titles = {}
+
+    def store_title(url, title):
+        if title is not None:
+            crag_link, external_link = title
+            climb_titles[url[len(base_url):]] = (base_url + replay_path(crag_link) if crag_link else None,
+                                                 external_link)
+
+    crawl_load('titles', climb_urls, parse_title_response, write=store_title)
+
+    crag_urls = sorted({crag_link for crag_link, _ in climb_titles.values() if crag_link})
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as directory:
+        crags = resolve_crags(crag_urls, path=os.path.join(directory, 'crag_locations.json'),
+                              workers=workers, concurrency=concurrency)
+    results.append(_load_result('crags', len(crag_urls), start, len(crag_urls) - len(crags)))
+
+    # every replayed page comes from the same host, so it gets the load's concurrency and no rate limit
+    start = time.perf_counter()
+    resolver = ReplayLocationResolver(base_url, climb_titles, crags, {domain_of(base_url): (concurrency, None)})
+    df = resolver.resolve(climb_titles)
+    results.append(_load_result('locations', len(df), start, int(df['location_source'].isna().sum())))
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Load test the crawler against the local replay server")
+    add_server_arguments(arg_parser)
+    arg_parser.add_argument('--concurrency', type=int, nargs='+', default=CONCURRENCY_LEVELS)
+    arg_parser.add_argument('--pages', type=int, help="number of climb pages to fetch (all recorded by default)")
+    arg_parser.add_argument('--backoff-factor', type=float, default=crawler.BACKOFF_FACTOR,
+                            help="scale the retry backoff down to keep runs short")
+    arg_parser.add_argument('--pipeline', action='store_true',
+                            help="run the listing, climb and location scrapers over the recorded pages too")
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count(), help="parser processes with --pipeline")
+    args = arg_parser.parse_args()
+
+    crawler.USE_CACHE = False # every page has to come from the server
+    crawler.BACKOFF_FACTOR = args.backoff_factor
+    server = server_from_args(args)
+    base_url = server.start_in_thread()
+    urls = [base_url + path for path in server.pages if path.startswith('/climb/')][:args.pages]
+    if not urls:
+        raise SystemExit(f"No recorded climb pages in {args.cache_dir}")
+    print(f"Replaying {len(urls)} climb pages from {base_url}")
+
+    try:
+        print(f"{'concurrency':>11}{'pages/s':>10}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}{'ok':>7}{'failed':>7}{'other':>7}")
+        for concurrency in args.concurrency:
+            r = fetch_load(urls, concurrency)
+            print(f"{r['concurrency']:>11}{r['pages_per_second']:>10.1f}{r['p50']:>8.3f}{r['p95']:>8.3f}"
+                  f"{r['p99']:>8.3f}{r['ok']:>7}{r['failed']:>7}{r['other']:>7}")
+        if args.pipeline:
+            print(f"{'scraper':>11}{'concurrency':>12}{'items':>7}{'items/s':>10}{'missed':>8}")
+            for concurrency in args.concurrency:
+                for r in pipeline_load(base_url, list(server.pages), concurrency, args.workers, args.pages):
+                    print(f"{r['scraper']:>11}{concurrency:>12}{r['items']:>7}{r['per_second']:>10.1f}{r['missed']:>8}")
+    finally:
+        server.stop_thread()
+    print(f"Server responses: {dict(server.stats)}")
+
+
+if __name__ == "__main__":
+    main()
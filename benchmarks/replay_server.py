@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+import collections
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '..'))
+
+from climbing_history.crawler import CACHE_DIR, STATUS_FORCELIST
+from climbing_history.page_cache import PageCache
+
+# the site the scrapers crawl, its pages are served at their own path (/climbs?page=3, /climb/167/keen-roof)
+# pages of any other host (UKC, 8a.nu) are served at /<host>/<path>
+SITE = "climbing-history.org"
+
+
+def replay_path(url):
+    """The path a recorded url is served at"""
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    return path if host.endswith(SITE) else f"/{host}{path}"
+
+
+def recorded_url(path):
+    """The url a replayed path was recorded from, the inverse of replay_path"""
+    host, _, rest = path[1:].partition('/')
+    if '.' in host and '?' not in host:
+        return f"https://{host}/{rest}"
+    return f"https://{SITE}{path}"
+
+
+class Latency:
+    """Response delay distribution: 'fixed' (median), 'uniform' (0 to 2 * median) or 'lognormal' (median, sigma)"""
+
+    def __init__(self, kind='lognormal', median=0.05, sigma=0.5):
+        if kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution {kind!r}")
+        self.kind = kind
+        self.median = median
+        self.sigma = sigma
+
+    def sample(self, rng):
+        if self.kind == 'fixed':
+            return self.median
+        if self.kind == 'uniform':
+            return rng.uniform(0, 2 * self.median)
+        return rng.lognormvariate(0, self.sigma) * self.median if self.median else 0
+
+
+class ReplayServer:
+    """Local stand-in for the scraped sites, serving recorded pages with simulated trouble.
+
+    Every request waits for a delay drawn from latency, then a fraction error_rate of them gets
+    one of the STATUS_FORCELIST errors. Past rate_limit requests per second (None for no limit)
+    the server answers rate_limit_status with a Retry-After header, like a site throttling us.
+    Unknown paths get a 404. Counts of the answered statuses are kept in stats.
+    """
+
+    def __init__(self, pages, latency=None, error_rate=0.0, rate_limit=None, rate_limit_status=429, seed=None):
+        self.pages = pages # {path: html}
+        self.latency = latency or Latency('fixed', 0)
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_limit_status = rate_limit_status
+        self.rng = random.Random(seed)
+        self.stats = collections.Counter()
+        self._window_start = 0.0
+        self._window_requests = 0
+        self._runner = None
+        self._loop = None
+        self.base_url = None
+
+    @classmethod
+    def from_page_cache(cls, cache_dir=CACHE_DIR, **kwargs):
+        """Serve every page in the crawler's page cache"""
+        cache = PageCache(cache_dir)
+        pages = {}
+        for url in cache.urls():
+            cached = cache.get(url, ttl=float('inf'))
+            if cached is not None and cached[0] == 200:
+                pages[replay_path(url)] = cached[1]
+        cache.close()
+        return cls(pages, **kwargs)
+
+    def url(self, url):
+        """Where the replay server serves a recorded url"""
+        return self.base_url + replay_path(url)
+
+    def _rate_limited(self):
+        if self.rate_limit is None:
+            return False
+        now = time.monotonic()
+        if now - self._window_start >= 1:
+            self._window_start = now
+            self._window_requests = 0
+        self._window_requests += 1
+        return self._window_requests > self.rate_limit
+
+    async def handle(self, request):
+        await asyncio.sleep(self.latency.sample(self.rng))
+        if self._rate_limited():
+            status = self.rate_limit_status
+            self.stats[status] += 1
+            return web.Response(status=status, headers={'Retry-After': '1'})
+        if self.rng.random() < self.error_rate:
+            status = self.rng.choice(STATUS_FORCELIST)
+            self.stats[status] += 1
+            return web.Response(status=status)
+        html = self.pages.get(request.path_qs)
+        if html is None:
+            self.stats[404] += 1
+            return web.Response(status=404)
+        self.stats[200] += 1
+        return web.Response(text=html, content_type='text/html')
+
+    async def start(self, host='127.0.0.1', port=0):
+        app = web.Application()
+        app.router.add_route('GET', '/{tail:.*}', self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self, host='127.0.0.1', port=0):
+        """Run the server on its own event loop in a background thread, returns the base url"""
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start(host, port))
+            started.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        started.wait()
+        return self.base_url
+
+    def stop_thread(self):
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def add_server_arguments(arg_parser):
+    arg_parser.add_argument('--cache-dir', default=CACHE_DIR, help="page cache holding the recorded pages")
+    arg_parser.add_argument('--latency', choices=['fixed', 'uniform', 'lognormal'], default='lognormal')
+    arg_parser.add_argument('--median-latency', type=float, default=0.05, help="seconds")
+    arg_parser.add_argument('--sigma', type=float, default=0.5, help="spread of the lognormal latency")
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of 50x responses")
+    arg_parser.add_argument('--rate-limit', type=int, help="requests per second before throttling")
+    arg_parser.add_argument('--rate-limit-status', type=int, default=429)
+    arg_parser.add_argument('--seed', type=int)
+
+
+def server_from_args(args):
+    return ReplayServer.from_page_cache(
+        args.cache_dir, latency=Latency(args.latency, args.median_latency, args.sigma),
+        error_rate=args.error_rate, rate_limit=args.rate_limit, rate_limit_status=args.rate_limit_status,
+        seed=args.seed)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Serve the recorded pages locally with simulated latency and errors")
+    add_server_arguments(arg_parser)
+    arg_parser.add_argument('--port', type=int, default=8080)
+    args = arg_parser.parse_args()
+
+    server = server_from_args(args)
+
+    async def serve():
+        print(f"Serving {len(server.pages)} pages at {await server.start(port=args.port)}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print(f"Responses: {dict(server.stats)}")
+
+
+if __name__ == "__main__":
+    main()
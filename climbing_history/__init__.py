@@ -0,0 +1,5 @@
+"""Scraping and analysis of climbing-history.org and the IFSC bouldering results.
+
+Run the pipeline with python -m climbing_history <command> (see cli.py), the modules are importable
+on their own and only pull in their own dependencies.
+"""
@@ -0,0 +1,86 @@
+"""Command line interface of the pipeline, python -m climbing_history <command>
+
+Only the module of the command that runs is imported, so geopandas, selenium, plotly, matplotlib
+and the like are only loaded by the commands that need them and --help starts instantly.
+"""
+import argparse
+import importlib
+import os
+
+# command: (module, function, help), the function takes no arguments
+COMMANDS = {
+    'listings': ('scrape_climbing_history', 'run_listing', "scrape the listing pages into the links and grades files"),
+    'ascents': ('scrape_climbing_history', 'run_ascents',
+                "scrape the climb pages of the links file into the climbs and ascents datasets"),
+    'scrape': ('scrape_climbing_history', 'main', "listings, then ascents"),
+    'locations': ('scrape_route_locations', 'main', "find the location and country of every route"),
+    'merge': ('merge_routes_locations', 'main', "add the route locations to the cleaned ascents"),
+    'map': ('map_routes_locations', 'main', "draw the route maps"),
+    'grades': ('grades', 'main', "report how much of the grades file the grade table covers"),
+}
+# commands with options of their own, the arguments after the command are passed to main(argv)
+FORWARDING_COMMANDS = {
+    'ifsc': ('ifsc.scrape_ifsc_bouldering', 'main', "scrape the IFSC bouldering results"),
+    'analyse': ('ifsc.general_analysis_ifsc_bouldering', 'main', "analyse the IFSC bouldering results"),
+    'compare-parsers': ('parsing', 'main', "diff the html backends over the cached climbing-history pages"),
+    'compare-ifsc-parsers': ('ifsc.ifsc_parsing', 'main', "diff the html backends over saved IFSC pages"),
+}
+
+
+def make_parser():
+    arg_parser = argparse.ArgumentParser(prog='python -m climbing_history',
+                                         description="Scraping and analysis of climbing-history.org and the IFSC results")
+    arg_parser.add_argument('--data-dir', help="where the datasets and caches live (CLIMBING_DATA_DIR)")
+    arg_parser.add_argument('--profile-dir', help="cProfile every stage into this directory (CLIMBING_PROFILE_DIR)")
+    commands = arg_parser.add_subparsers(dest='command', metavar='command', required=True)
+    for name, (_, _, help_text) in COMMANDS.items():
+        commands.add_parser(name, help=help_text, description=help_text)
+    commands.add_parser('paths', help="print the configured paths")
+    for name, (_, _, help_text) in FORWARDING_COMMANDS.items():
+        # no -h of its own, so --help reaches the command's parser
+        commands.add_parser(name, help=help_text, add_help=False)
+    return arg_parser
+
+
+def run(command, argv=()):
+    """Import the command's module and run it"""
+    if command in FORWARDING_COMMANDS:
+        module_name, function_name, _ = FORWARDING_COMMANDS[command]
+        args = (list(argv),)
+    else:
+        module_name, function_name, _ = COMMANDS[command]
+        args = ()
+    module = importlib.import_module(f"{__package__}.{module_name}")
+    return getattr(module, function_name)(*args)
+
+
+def print_paths():
+    from . import config
+    for name in ('PROJECT_DIR', 'DATA_DIR', 'GEO_DIR', 'PLOTS_DIR', 'METRICS_DIR'):
+        print(f"{name:12} {getattr(config, name)}")
+
+
+def main(argv=None):
+    arg_parser = make_parser()
+    args, command_argv = arg_parser.parse_known_args(argv)
+    if command_argv and args.command not in FORWARDING_COMMANDS:
+        arg_parser.error(f"unrecognized arguments: {' '.join(command_argv)}")
+    # the settings are read when the modules are imported, and the parser processes inherit the environment
+    if args.data_dir:
+        os.environ['CLIMBING_DATA_DIR'] = args.data_dir
+    if args.profile_dir:
+        os.environ['CLIMBING_PROFILE_DIR'] = args.profile_dir
+    if args.command == 'paths':
+        print_paths()
+        return
+
+    from .metrics import METRICS, export_metrics
+    try:
+        run(args.command, command_argv)
+    finally:
+        if METRICS.counters or METRICS.histograms:
+            export_metrics(args.command) # also for a failed run
+
+
+if __name__ == "__main__":
+    main()
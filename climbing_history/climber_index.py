@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+from .config import data_path
+from .grades import is_boulder_code
+
+NO_DATE = np.iinfo('int64').max # undated ascents sort after all the dated ones
+CLIMBER_INDEX_PATH = data_path('climber_index.npz')
+
+
+def _group_offsets(keys, n_groups):
+    """offsets[k]:offsets[k + 1] is the slice of the rows sorted by keys that has key k"""
+    return np.concatenate([[0], np.cumsum(np.bincount(keys, minlength=n_groups))])
+
+
+class ClimberIndex:
+    """In-memory index of the ascent table for fast climber and climb lookups.
+
+    Climber names are interned to integer ids. Two inverted indexes (climber -> ascents and
+    climb -> ascents) are kept as sorted row arrays plus offsets, so the ascents of a climber or
+    of a climb are a single slice. A climb's ascents are sorted by date, that is its timeline:
+    position 0 is the first ascent, position 1 the first repeat and so on.
+    """
+
+    def __init__(self, names, climber, climb, date, grade, style, style_names):
+        self.names = np.asarray(names, dtype=object)
+        self.climber = climber # per ascent row: climber id
+        self.climb = climb # climb_id
+        self.date = date # days since 1970, NO_DATE when unknown
+        self.grade = grade # official grade code, -1 when unknown
+        self.style = style # code into style_names
+        self.style_names = np.asarray(style_names, dtype=object)
+        self._ids = {name: i for i, name in enumerate(self.names)}
+
+        self.by_climber = np.argsort(climber, kind='stable')
+        self.climber_offsets = _group_offsets(climber, len(self.names))
+        self.climb_ids, climb_keys = np.unique(climb, return_inverse=True)
+        # climb timelines: by climb, then by date
+        self.by_climb = np.lexsort((date, climb_keys))
+        self.climb_offsets = _group_offsets(climb_keys, len(self.climb_ids))
+        self.position = np.empty(len(climb), dtype='int32')
+        self.position[self.by_climb] = (np.arange(len(climb)) - np.repeat(self.climb_offsets[:-1],
+                                                                          np.diff(self.climb_offsets)))
+
+    @classmethod
+    def from_ascents(cls, ascents):
+        """Build the index from the ascent table of scrape_climbing_history.py (the 'ascents' dataset)"""
+        climber, names = pd.factorize(ascents['climber'], sort=True)
+        style, style_names = pd.factorize(ascents['style'].astype(str))
+        climbs = pd.array(ascents['climb_id'], dtype='Int32').to_numpy(dtype='int32', na_value=-1)
+        keep = (climber >= 0) & (climbs >= 0) # ascents without a climber or a climb can't be looked up
+        dates = pd.to_datetime(ascents['parsed_date']).to_numpy(dtype='datetime64[D]').astype('int64')
+        dates[pd.isna(ascents['parsed_date']).to_numpy()] = NO_DATE
+        grades = pd.array(ascents['official_grade_code'], dtype='Int16').to_numpy(dtype='int16', na_value=-1)
+        return cls(np.asarray(names, dtype=object), climber[keep].astype('int32'),
+                   climbs[keep], dates[keep],
+                   grades[keep], style[keep].astype('int16'), style_names)
+
+    ###################
+    # persistence
+    ###################
+
+    def save(self, path=CLIMBER_INDEX_PATH):
+        np.savez_compressed(path, names=self.names.astype(str), climber=self.climber, climb=self.climb,
+                            date=self.date, grade=self.grade, style=self.style,
+                            style_names=self.style_names.astype(str))
+
+    @classmethod
+    def load(cls, path=CLIMBER_INDEX_PATH):
+        with np.load(path) as data:
+            return cls(data['names'].astype(object), data['climber'], data['climb'], data['date'],
+                       data['grade'], data['style'], data['style_names'].astype(object))
+
+    ###################
+    # queries
+    ###################
+
+    def climber_id(self, name):
+        """The id of a climber, KeyError for names not in the index"""
+        return self._ids[name]
+
+    def _rows(self, rows):
+        dates = self.date[rows]
+        return pd.DataFrame({
+            'climber': self.names[self.climber[rows]],
+            'climb_id': self.climb[rows],
+            'date': pd.to_datetime(np.where(dates == NO_DATE, np.datetime64('NaT'),
+                                            dates.astype('datetime64[D]'))),
+            'grade_code': self.grade[rows],
+            'style': self.style_names[self.style[rows]],
+            'position': self.position[rows],
+        })
+
+    def climber_rows(self, name):
+        """Row numbers of a climber's ascents"""
+        i = self.climber_id(name)
+        return self.by_climber[self.climber_offsets[i]:self.climber_offsets[i + 1]]
+
+    def climb_rows(self, climb_id):
+        """Row numbers of a climb's ascents, in timeline order (empty for unknown climbs)"""
+        i = np.searchsorted(self.climb_ids, climb_id)
+        if i == len(self.climb_ids) or self.climb_ids[i] != climb_id:
+            return self.by_climb[:0]
+        return self.by_climb[self.climb_offsets[i]:self.climb_offsets[i + 1]]
+
+    def ascents_by(self, name):
+        return self._rows(self.climber_rows(name))
+
+    def timeline(self, climb_id):
+        """The ascents of a climb, first ascent first"""
+        return self._rows(self.climb_rows(climb_id))
+
+    def first_ascents_by(self, name):
+        """The climbs a climber was the first to climb (the first ascent on their timeline)"""
+        rows = self.climber_rows(name)
+        return self._rows(rows[self.position[rows] == 0])
+
+    def first_repeat(self, climb_id):
+        """Name of the climber who repeated the climb first, None if it has no repeat yet"""
+        rows = self.climb_rows(climb_id)
+        return self.names[self.climber[rows[1]]] if len(rows) > 1 else None
+
+    def repeats_by_year(self, min_grade_code):
+        """Number of repeats (not first ascents) of climbs graded min_grade_code or harder, per year.
+
+        Only the climbs on the same scale as min_grade_code count (routes or boulders, see grades.py).
+        """
+        same_scale = is_boulder_code(self.grade) == is_boulder_code(min_grade_code)
+        mask = (self.position > 0) & same_scale & (self.grade >= min_grade_code) & (self.date != NO_DATE)
+        years = self.date[mask].astype('datetime64[D]').astype('datetime64[Y]').astype(int) + 1970
+        return pd.Series(years).value_counts().sort_index().rename_axis('year').rename('repeats')
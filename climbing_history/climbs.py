@@ -0,0 +1,47 @@
+import pandas as pd
+
+from .grades import encode_grades, strip_approx
+
+# every climb link carries the site's numeric id: /climb/167/keen-roof
+CLIMB_ID_PATTERN = r'/climb/(\d+)'
+
+
+def climb_ids(links):
+    """The integer climb id of every link (nullable Int32, missing if the link has none)"""
+    links = pd.Series(links)
+    return links.str.extract(CLIMB_ID_PATTERN, expand=False).astype('Int32')
+
+
+def route_names(links):
+    """The display name of every link's climb, keen-roof -> Keen Roof (each distinct link once)"""
+    links = pd.Series(links)
+    codes, uniques = pd.factorize(links)
+    names = pd.Series([" ".join(word.capitalize() for word in link.split("/")[-1].split("-")) for link in uniques] + [None],
+                      dtype=object)
+    return pd.Series(names.values[codes], index=links.index)
+
+
+def with_climb_ids(df, link_column='link'):
+    """df with a climb_id column, parsed from its links if it doesn't have one yet"""
+    if 'climb_id' not in df.columns:
+        df = df.assign(climb_id=climb_ids(df[link_column]).values)
+    return df
+
+
+def build_climb_table(links, grades, boulder=False):
+    """The climb dimension table, one row per climb keyed by climb_id.
+
+    Columns: climb_id, link, route, official_grade and its code and approx flag (see grades.py).
+    boulder (True or one flag per link) marks the boulders, whose grades are on the Font scale.
+    The ascent and location datasets refer to the climbs by climb_id only.
+    """
+    climbs = pd.DataFrame({'link': links, 'official_grade': grades, 'boulder': boulder})
+    climbs.insert(0, 'climb_id', climb_ids(climbs['link']))
+    climbs = climbs.dropna(subset=['climb_id']).drop_duplicates('climb_id').sort_values('climb_id')
+    climbs['route'] = route_names(climbs['link'])
+    encoded = encode_grades(climbs['official_grade'], boulder=climbs['boulder'].to_numpy())
+    climbs['official_grade_code'] = encoded['grade_code']
+    climbs['official_grade_approx'] = encoded['grade_approx']
+    climbs['official_grade'] = strip_approx(climbs['official_grade'])
+    return climbs[['climb_id', 'link', 'route', 'official_grade', 'official_grade_code',
+                   'official_grade_approx']].reset_index(drop=True)
@@ -0,0 +1,35 @@
+"""Where the pipeline reads and writes its files.
+
+The settings come from the environment, so the same code runs on any machine:
+
+    CLIMBING_DATA_DIR     datasets, caches, archives and crawl state (default c://data//climbing)
+    CLIMBING_GEO_DIR      the Natural Earth shapefiles (default C://Data//geo)
+    CLIMBING_PLOTS_DIR    the figures (default plots/ in the repository)
+    CLIMBING_METRICS_DIR  the exported run metrics (default metrics/ in the data directory)
+
+The modules build their paths from these when they are imported, the CLI's --data-dir sets
+CLIMBING_DATA_DIR before it imports anything else (see cli.py).
+"""
+import os
+
+# the repository, holding the links and grades lists shared by the scrapers
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DATA_DIR = os.environ.get('CLIMBING_DATA_DIR', "c://data//climbing")
+GEO_DIR = os.environ.get('CLIMBING_GEO_DIR', "C://Data//geo")
+PLOTS_DIR = os.environ.get('CLIMBING_PLOTS_DIR', os.path.join(PROJECT_DIR, 'plots'))
+METRICS_DIR = os.environ.get('CLIMBING_METRICS_DIR', os.path.join(DATA_DIR, 'metrics'))
+
+LINKS_PATH = os.path.join(PROJECT_DIR, 'all_climb_links.txt')
+GRADES_PATH = os.path.join(PROJECT_DIR, 'all_grades.txt')
+GRADES_CONVERSION_PATH = os.path.join(PROJECT_DIR, 'grades_conversion.txt')
+
+
+def data_path(*parts):
+    """A path in the data directory"""
+    return os.path.join(DATA_DIR, *parts)
+
+
+def project_path(*parts):
+    """A path in the repository"""
+    return os.path.join(PROJECT_DIR, *parts)
@@ -0,0 +1,55 @@
+import json
+import os
+
+from .config import data_path
+from .crawler import DEFAULT_CONCURRENCY, crawl
+from .parsing import parse_crag_page
+
+# crag name, coordinates and external link for every crag resolved so far
+CRAG_LOCATIONS_PATH = data_path('crag_locations.json')
+
+
+def load_crag_locations(path=CRAG_LOCATIONS_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_crag_locations(crags, path=CRAG_LOCATIONS_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(crags, file, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def parse_crag_response(url, status_code, text):
+    """Crag details from a crag page, None if the page didn't load (runs in the parser processes)"""
+    if status_code != 200:
+        print(f"Error fetching {url}: status {status_code}")
+        return None
+    return parse_crag_page(text)
+
+
+def resolve_crags(crag_links, path=CRAG_LOCATIONS_PATH, workers=0, concurrency=DEFAULT_CONCURRENCY):
+    """Resolve each distinct crag once and return {crag_link: crag}.
+
+    Crags already stored in path are not fetched again, newly resolved ones are added to it.
+    Crags whose page couldn't be fetched are left out (and retried on the next run).
+    A crag without a map marker has latitude and longitude set to None.
+    """
+    crags = load_crag_locations(path)
+    to_resolve = sorted(set(crag_links) - set(crags))
+    print(f"{len(set(crag_links))} distinct crags, {len(to_resolve)} to resolve")
+
+    def store_crag(crag_link, crag):
+        if crag is None:
+            return
+        crags[crag_link] = crag
+        if len(crags) % 100 == 0: # checkpoint, so an interrupted run doesn't lose the crags resolved so far
+            save_crag_locations(crags, path)
+
+    if to_resolve:
+        crawl(to_resolve, parse_crag_response, write=store_crag, concurrency=concurrency, workers=workers)
+        save_crag_locations(crags, path)
+    return {crag_link: crags[crag_link] for crag_link in set(crag_links) if crag_link in crags}
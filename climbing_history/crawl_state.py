@@ -0,0 +1,111 @@
+import json
+import sqlite3
+import time
+
+PENDING = 'pending'
+DONE = 'done'
+NO_ASCENTS = 'no_ascents'
+FAILED = 'failed'
+
+
+class CrawlState:
+    """Persistent record of the climb pages crawl, stored in SQLite.
+
+    Every climb found in the listing has a status (pending, done, no_ascents or failed), the
+    listing row it was discovered with and, once scraped, its extracted ascent rows. Rows are
+    committed as soon as a climb is scraped, so an interrupted crawl continues where it stopped.
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS climbs (
+                link TEXT PRIMARY KEY,
+                grade TEXT,
+                listing_row TEXT,
+                status TEXT NOT NULL,
+                updated_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS ascents (
+                link TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                cells TEXT NOT NULL,
+                PRIMARY KEY (link, position));
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT);
+        """)
+        self.db.commit()
+
+    def update_listing(self, climbs):
+        """Store the freshly discovered listing, a list of (link, grade, listing_row).
+
+        New climbs and climbs whose listing row changed (e.g. a new ascent or a regrade) are set
+        to pending. Returns the links of the new and of the changed climbs.
+        """
+        known = dict(self.db.execute("SELECT link, listing_row FROM climbs"))
+        new_links, changed_links = [], []
+        now = time.time()
+        for link, grade, listing_row in climbs:
+            if link not in known:
+                new_links.append(link)
+            elif known[link] != listing_row:
+                changed_links.append(link)
+            else:
+                continue
+            self.db.execute("""INSERT INTO climbs VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(link) DO UPDATE SET grade = excluded.grade,
+                listing_row = excluded.listing_row, status = excluded.status, updated_at = excluded.updated_at""",
+                            (link, grade, listing_row, PENDING, now))
+        self.db.commit()
+        return new_links, changed_links
+
+    def start_full_refresh(self):
+        """Set every climb to pending, unless an interrupted full refresh is still to be finished"""
+        if self.get_meta('full_refresh') == 'running':
+            return False
+        self.db.execute("UPDATE climbs SET status = ?, updated_at = ?", (PENDING, time.time()))
+        self.set_meta('full_refresh', 'running')
+        return True
+
+    def finish_full_refresh(self):
+        self.set_meta('full_refresh', 'finished')
+
+    def to_scrape(self, links):
+        """The links, in order, that are not scraped yet (pending or failed on a previous run)"""
+        status = dict(self.db.execute("SELECT link, status FROM climbs"))
+        return [link for link in links if status.get(link, PENDING) in (PENDING, FAILED)]
+
+    def record(self, link, rows, status=DONE):
+        """Checkpoint the ascent rows extracted for one climb"""
+        with self.db:
+            self.db.execute("DELETE FROM ascents WHERE link = ?", (link,))
+            self.db.executemany("INSERT INTO ascents VALUES (?, ?, ?)",
+                                [(link, i, json.dumps(cells)) for i, cells in enumerate(rows)])
+            self.db.execute("""INSERT INTO climbs (link, status, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(link) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at""",
+                            (link, status, time.time()))
+
+    def record_failure(self, link):
+        with self.db:
+            self.db.execute("""INSERT INTO climbs (link, status, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(link) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at""",
+                            (link, FAILED, time.time()))
+
+    def rows(self, links):
+        """All the stored ascent rows of the given climbs, in the order of links"""
+        data = []
+        for link in links:
+            data.extend(json.loads(cells) for (cells,) in self.db.execute(
+                "SELECT cells FROM ascents WHERE link = ? ORDER BY position", (link,)))
+        return data
+
+    def counts(self):
+        return dict(self.db.execute("SELECT status, COUNT(*) FROM climbs GROUP BY status"))
+
+    def get_meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
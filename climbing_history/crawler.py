@@ -0,0 +1,215 @@
+import asyncio
+import atexit
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+from tqdm import tqdm
+
+from . import metrics
+from .config import data_path
+from .page_cache import PageCache
+
+# retry policy shared by the blocking and the asyncio crawlers
+RETRY_TOTAL = 5
+BACKOFF_FACTOR = 1
+BACKOFF_MAX = 120
+STATUS_FORCELIST = [500, 502, 503, 504]
+# also retried when the server says when to come back, like urllib3's Retry.RETRY_AFTER_STATUS_CODES
+RETRY_AFTER_STATUS_CODES = [413, 429, 503]
+TIMEOUT = 10
+
+DEFAULT_CONCURRENCY = 20
+
+# on-disk page cache shared by all the scrapers, so each page goes over the wire once per refresh
+CACHE_DIR = data_path('page_cache')
+CACHE_TTL = 7 * 24 * 3600 # a refresh is done within a week
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+USE_CACHE = True
+
+_page_cache = None
+_session = None
+
+
+class CrawlError(Exception):
+    """Raised when a page still fails after all the retries"""
+
+
+def make_session():
+    """Blocking requests session with the retry policy used by all the scrapers"""
+    retries = Retry(total=RETRY_TOTAL, backoff_factor=BACKOFF_FACTOR, status_forcelist=STATUS_FORCELIST)
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(max_retries=retries))
+    return session
+
+
+def backoff_time(retry):
+    """Seconds to wait before the given retry (1-based), same schedule as urllib3's Retry"""
+    if retry <= 1:
+        return 0
+    return min(BACKOFF_MAX, BACKOFF_FACTOR * (2 ** (retry - 1)))
+
+
+def get_page_cache():
+    """The shared page cache, or None when caching is switched off"""
+    global _page_cache
+    if not USE_CACHE:
+        return None
+    if _page_cache is None:
+        _page_cache = PageCache(CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES)
+        atexit.register(_page_cache.flush) # the index writes are committed in batches
+        metrics.register_collector(_page_cache_metrics)
+    return _page_cache
+
+
+def _page_cache_metrics():
+    lookups = _page_cache.hits + _page_cache.misses
+    return [('page_cache_hits', {}, _page_cache.hits),
+            ('page_cache_misses', {}, _page_cache.misses),
+            ('page_cache_hit_ratio', {}, _page_cache.hits / lookups if lookups else 0)]
+
+
+def fetch(url, headers=None, ttl=None):
+    """Blocking fetch through the page cache, returns (status, text).
+
+    Only 200 responses are cached. Raises requests.exceptions.RequestException like session.get.
+    ttl overrides the cache's default maximum age (0 always goes to the network).
+    """
+    global _session
+    cache = get_page_cache()
+    if cache is not None:
+        cached = cache.get(url, ttl=ttl)
+        if cached is not None:
+            return cached
+    if _session is None:
+        _session = make_session()
+    with metrics.timer('fetch_seconds', mode='blocking'):
+        response = _session.get(url, headers=headers, timeout=TIMEOUT)
+    metrics.inc('http_responses', status=response.status_code)
+    metrics.inc('http_bytes', len(response.content))
+    if cache is not None and response.status_code == 200:
+        cache.put(url, response.status_code, response.text)
+    return response.status_code, response.text
+
+
+def _is_retry(status, has_retry_after):
+    return status in STATUS_FORCELIST or (has_retry_after and status in RETRY_AFTER_STATUS_CODES)
+
+
+async def fetch_text(session, url, semaphore, ttl=None):
+    """Fetch a page through the page cache with retries and backoff, returns (status, text)"""
+    cache = get_page_cache()
+    if cache is not None:
+        cached = cache.get(url, ttl=ttl)
+        if cached is not None:
+            return cached
+    start = time.perf_counter()
+    for retry in range(RETRY_TOTAL + 1):
+        retry_after = 0
+        if retry:
+            metrics.inc('http_retries')
+        try:
+            # only hold a connection slot while actually talking to the server
+            async with semaphore:
+                async with session.get(url) as response:
+                    metrics.inc('http_responses', status=response.status)
+                    if not _is_retry(response.status, 'Retry-After' in response.headers):
+                        body = await response.read() # text() decodes this same body
+                        metrics.inc('http_bytes', len(body))
+                        text = await response.text()
+                        if cache is not None and response.status == 200:
+                            cache.put(url, response.status, text)
+                        # the whole fetch, retries and backoff included
+                        metrics.observe('fetch_seconds', time.perf_counter() - start, mode='async')
+                        return response.status, text
+                    if retry == RETRY_TOTAL:
+                        raise CrawlError(f"too many {response.status} error responses")
+                    header = response.headers.get('Retry-After', '')
+                    retry_after = int(header) if header.isdigit() else 0
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            metrics.inc('http_errors', error=type(e).__name__)
+            if retry == RETRY_TOTAL:
+                raise CrawlError(str(e) or type(e).__name__) from e
+        await asyncio.sleep(max(retry_after, backoff_time(retry + 1)))
+
+
+async def _crawl(urls, parse, write, concurrency, workers, queue_size, ttl):
+    loop = asyncio.get_running_loop()
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency)
+    timeout = aiohttp.ClientTimeout(sock_connect=TIMEOUT, sock_read=TIMEOUT)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [None] * len(urls)
+    skipped_urls = []
+
+    # fetch stage -> bounded queue of raw pages -> parse stage (process pool) -> write stage
+    # the fetchers block on a full queue, so pages never pile up faster than they are parsed
+    todo = asyncio.Queue()
+    for i, url in enumerate(urls):
+        todo.put_nowait((i, url))
+    pages = asyncio.Queue(maxsize=queue_size)
+    executor = ProcessPoolExecutor(workers) if workers else None
+    progress = tqdm(total=len(urls))
+
+    async def fetcher(session):
+        while not todo.empty():
+            i, url = todo.get_nowait()
+            try:
+                status, text = await fetch_text(session, url, semaphore, ttl=ttl)
+            except CrawlError as e:
+                print(f"Error fetching {url}: {e}")
+                metrics.inc('pages_skipped')
+                skipped_urls.append(url)
+                progress.update()
+                continue
+            await pages.put((i, url, status, text))
+
+    async def parser():
+        while True:
+            page = await pages.get()
+            if page is None:
+                break
+            i, url, status, text = page
+            with metrics.timer('stage_seconds', stage='parse'):
+                if executor is None:
+                    result = parse(url, status, text)
+                else:
+                    result = await loop.run_in_executor(executor, parse, url, status, text)
+            results[i] = result
+            if write is not None:
+                with metrics.timer('stage_seconds', stage='write'):
+                    write(url, result)
+            progress.update()
+
+    n_parsers = workers or 1
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            async def fetch_all():
+                await asyncio.gather(*[fetcher(session) for _ in range(concurrency)])
+                for _ in range(n_parsers):
+                    await pages.put(None) # tell the parsers there is nothing more to come
+            await asyncio.gather(fetch_all(), *[parser() for _ in range(n_parsers)])
+    finally:
+        progress.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return results, skipped_urls
+
+
+def crawl(urls, parse, write=None, concurrency=DEFAULT_CONCURRENCY, workers=0, queue_size=None, ttl=None):
+    """Fetch all urls concurrently through one pooled connection and parse each response.
+
+    parse(url, status, text) runs as soon as a page arrives: in the event loop when workers is 0,
+    otherwise in a pool of that many processes (parse must then be a module level function).
+    write(url, result), if given, is called in this process with every parsed result, e.g. to
+    persist it. At most queue_size fetched pages wait to be parsed (default: 4 per worker).
+
+    Returns the parsed results in the same order as urls (None for pages that couldn't be
+    fetched) and the skipped urls. Pages already in the page cache are served from disk.
+    """
+    urls = list(urls)
+    queue_size = queue_size or 4 * max(workers, 1)
+    return asyncio.run(_crawl(urls, parse, write, concurrency, workers, queue_size, ttl))
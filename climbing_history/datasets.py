@@ -0,0 +1,82 @@
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .config import data_path
+
+# the datasets passed between the pipeline stages live here as parquet (string columns are
+# dictionary encoded in the files), excel is only an export
+DATA_DIR = data_path('datasets')
+
+# partition columns of the datasets that are usually read one slice at a time
+PARTITIONS = {
+    'ascents': ['style'],
+}
+
+
+def dataset_path(name, data_dir=None):
+    return os.path.join(data_dir or DATA_DIR, name)
+
+
+def dataset_exists(name, data_dir=None):
+    return os.path.exists(dataset_path(name, data_dir))
+
+
+def _typed(df):
+    """Give every column a single type parquet can store.
+
+    Columns mixing strings and numbers (typical of frames read from excel) become strings.
+    """
+    df = df.copy()
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_object_dtype(values) and pd.api.types.infer_dtype(values, skipna=True).startswith('mixed'):
+            df[column] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+def write_dataset(df, name, partition_cols=None, data_dir=None):
+    """Write a frame as the parquet dataset name, replacing the previous version.
+
+    partition_cols defaults to the PARTITIONS of the dataset. The new version is written next to
+    the old one and swapped in at the end, so readers never see a half written dataset.
+    """
+    partition_cols = PARTITIONS.get(name) if partition_cols is None else partition_cols
+    path = dataset_path(name, data_dir)
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+
+    table = pa.Table.from_pandas(_typed(df), preserve_index=False)
+    if partition_cols:
+        pq.write_to_dataset(table, tmp_path, partition_cols=partition_cols)
+    else:
+        os.makedirs(tmp_path)
+        pq.write_table(table, os.path.join(tmp_path, "part-0.parquet"))
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def read_dataset(name, columns=None, filters=None, categories=None, data_dir=None):
+    """Read the parquet dataset name, only the given columns and the rows matching the filters.
+
+    filters uses the pyarrow syntax, e.g. [('style', '=', 'Boulder')], and is pushed down to the
+    partitions and row groups so the rest of the data is never read. The string columns listed in
+    categories are loaded straight from their parquet dictionaries as pandas categoricals.
+    """
+    table = pq.read_table(dataset_path(name, data_dir), columns=columns, filters=filters,
+                          read_dictionary=categories)
+    return table.to_pandas()
+
+
+def export_excel(name, path, data_dir=None):
+    """Write a dataset out as an excel file, for looking at it by hand"""
+    read_dataset(name, data_dir=data_dir).to_excel(path, index=False)
+
+
+def import_excel(path, name, data_dir=None):
+    """Store a (hand edited) excel file as the dataset name"""
+    write_dataset(pd.read_excel(path), name, data_dir=data_dir)
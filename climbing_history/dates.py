@@ -0,0 +1,117 @@
+from datetime import datetime
+
+import pandas as pd
+from dateutil import parser
+
+# precision of a normalised ascent date, the finest part of the date that is actually known
+YEAR = 'year'
+MONTH = 'month'
+DAY = 'day'
+PRECISIONS = [YEAR, MONTH, DAY]
+
+MONTHS = {name: i + 1 for i, name in enumerate(
+    ['january', 'february', 'march', 'april', 'may', 'june', 'july',
+     'august', 'september', 'october', 'november', 'december'])}
+MONTHS.update({name[:3]: number for name, number in MONTHS.items()})
+MONTHS['sept'] = 9
+SEASONS = {'spring', 'summer', 'autumn', 'fall', 'winter'}
+
+ORDINAL_PATTERN = r'(\d+)(st|nd|rd|th)'
+YEAR_PATTERN = r'^(?P<year>\d{4})$'
+SEASON_PATTERN = r'^(?:early |late |mid[- ])?(?P<season>[a-z]+),? (?P<year>\d{4})$'
+MONTH_YEAR_PATTERN = r'^(?:early |late |mid[- ])?(?P<month>[a-z]+)\.?,? (?P<year>\d{4})$'
+DAY_MONTH_YEAR_PATTERN = r'^(?P<day>\d{1,2}) (?:of )?(?P<month>[a-z]+)\.?,? (?P<year>\d{4})$'
+NUMERIC_DATE_PATTERN = r'^(?P<day>\d{1,2})[/.-](?P<month>\d{1,2})[/.-](?P<year>\d{4})$'
+ISO_DATE_PATTERN = r'^(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})$'
+
+# two different defaults for the dateutil fallback: whatever differs between the two parses
+# was filled in from the default, i.e. it's missing from the string
+DEFAULT_A = datetime(2000, 1, 1)
+DEFAULT_B = datetime(2001, 2, 2)
+
+
+def normalise_dates(dates):
+    """Parse a column of free-text ascent dates.
+
+    Returns a DataFrame with the same index and two columns: parsed_date (the first day of the
+    period for dates known to the year or month only, NaT when the string can't be parsed) and
+    date_precision (an ordered categorical: year, month or day).
+
+    Each distinct string is parsed once. The common formats (year only, season or month and year,
+    day month year with or without ordinals, numeric day/month/year) are parsed with vectorised
+    pattern matching, dateutil only sees the leftovers.
+    """
+    dates = pd.Series(dates)
+    unique = pd.Series(dates.dropna().astype(str).unique(), dtype=object)
+    clean = (unique.str.lower()
+             .str.replace(ORDINAL_PATTERN, r'\1', regex=True)
+             .str.replace(r'\s+', ' ', regex=True)
+             .str.strip())
+
+    parsed = pd.Series(pd.NaT, index=unique.index, dtype='datetime64[ns]')
+    precision = pd.Series(None, index=unique.index, dtype=object)
+
+    def fill(parts, level):
+        parts = parts.dropna(subset=['year'])
+        if parts.empty:
+            return
+        values = pd.to_datetime(parts[['year', 'month', 'day']], errors='coerce')
+        values = values[values.notna() & parsed.loc[values.index].isna()]
+        parsed.loc[values.index] = values
+        precision.loc[values.index] = level
+
+    def month_number(names):
+        return names.map(MONTHS)
+
+    # year only
+    parts = clean.str.extract(YEAR_PATTERN).astype(float)
+    fill(parts.assign(month=1, day=1), YEAR)
+
+    # numeric dates, day first like dateutil with dayfirst=True (ISO dates keep the year first)
+    parts = clean.str.extract(ISO_DATE_PATTERN).astype(float)
+    fill(parts, DAY)
+    parts = clean.str.extract(NUMERIC_DATE_PATTERN).astype(float)
+    fill(parts, DAY)
+
+    # day month year, "5 june 1990", "5th of jun. 1990"
+    parts = clean.str.extract(DAY_MONTH_YEAR_PATTERN)
+    parts['month'] = month_number(parts['month'])
+    fill(parts.dropna(subset=['month']).astype(float), DAY)
+
+    # month year, "june 1990"
+    parts = clean.str.extract(MONTH_YEAR_PATTERN)
+    parts['month'] = month_number(parts['month'])
+    fill(parts.dropna(subset=['month']).astype(float).assign(day=1), MONTH)
+
+    # season year, "spring 1987", only the year is known
+    parts = clean.str.extract(SEASON_PATTERN)
+    parts = parts[parts['season'].isin(SEASONS)]
+    fill(parts[['year']].astype(float).assign(month=1, day=1), YEAR)
+
+    # whatever is left goes through dateutil
+    for i in parsed.index[parsed.isna()]:
+        parsed.loc[i], precision.loc[i] = _parse_with_dateutil(clean.loc[i])
+
+    # spread the parsed distinct strings back over the whole column
+    as_str = dates.where(dates.isna(), dates.astype(str)).values
+    parsed_dates = pd.Series(parsed.values, index=unique.values).reindex(as_str).values
+    precisions = pd.Series(precision.values, index=unique.values).reindex(as_str).values
+    return pd.DataFrame({
+        'parsed_date': parsed_dates,
+        'date_precision': pd.Categorical(precisions, categories=PRECISIONS, ordered=True),
+    }, index=dates.index)
+
+
+def _parse_with_dateutil(entry):
+    try:
+        a = parser.parse(entry, dayfirst=True, default=DEFAULT_A)
+        b = parser.parse(entry, dayfirst=True, default=DEFAULT_B)
+    except (ValueError, OverflowError):
+        return pd.NaT, None
+    if a.year != b.year:
+        return pd.NaT, None # without a year the date is no use
+    if a.month != b.month:
+        return pd.Timestamp(a.year, 1, 1), YEAR
+    if a.day != b.day:
+        return pd.Timestamp(a.year, a.month, 1), MONTH
+    return pd.Timestamp(a.year, a.month, a.day), DAY
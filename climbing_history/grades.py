@@ -0,0 +1,132 @@
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+from .config import GRADES_CONVERSION_PATH, GRADES_PATH  # British trad grade -> French sport grade, the listing's grades
+
+# the route (French sport) scale, a route grade's code is its position in this list
+# Font boulder grades use the same notation (in capitals, the site writes both in lower case) but
+# are a different scale, a 7C+ boulder is much harder than a 7c+ route: they're coded
+# BOULDER_OFFSET + their position, and the style of the ascent tells which scale a grade is on.
+# Codes compare within a scale only, see is_boulder_code()
+LADDER = ['3', '4a', '4b', '4c', '5a', '5b', '5c'] + [
+    f"{number}{letter}{plus}" for number in (6, 7, 8, 9) for letter in 'abc' for plus in ('', '+')]
+BOULDER_OFFSET = 100
+FONT_LADDER = [f"Font {grade.upper()}" for grade in LADDER] # the labels of the boulder codes
+APPROX_SUFFIX = "(approx)"
+
+# grades written differently but meaning a LADDER grade
+ALIASES = {'4': '4a', '4+': '4c', '5': '5a', '5+': '5c'}
+# V-scale -> Font
+V_SCALE = {
+    'vb': '3', 'v0': '4a', 'v1': '5a', 'v2': '5c', 'v3': '6a', 'v4': '6b', 'v5': '6c', 'v6': '7a',
+    'v7': '7a+', 'v8': '7b', 'v9': '7c', 'v10': '7c+', 'v11': '8a', 'v12': '8a+', 'v13': '8b',
+    'v14': '8b+', 'v15': '8c', 'v16': '8c+', 'v17': '9a',
+}
+
+
+def load_british_conversion(path=GRADES_CONVERSION_PATH):
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def build_lookups(british=None):
+    """The precompiled tables from every known (lower case) grade to its code, for routes and for boulders"""
+    british = load_british_conversion() if british is None else british
+    positions = {grade: code for code, grade in enumerate(LADDER)}
+    v_scale = {grade: BOULDER_OFFSET + positions[font] for grade, font in V_SCALE.items()}
+
+    routes = dict(positions)
+    for table in (ALIASES, british):
+        routes.update({grade: positions[french] for grade, french in table.items() if french in positions})
+    routes.update(v_scale) # a V grade is a boulder grade whatever the style says
+
+    boulders = {grade: BOULDER_OFFSET + code for grade, code in positions.items()}
+    boulders.update({grade: BOULDER_OFFSET + positions[french] for grade, french in ALIASES.items()})
+    boulders.update(v_scale)
+    return routes, boulders
+
+
+ROUTE_LOOKUP, BOULDER_LOOKUP = build_lookups()
+# 'e7 6c' is the british adjectival and technical grade, only the first part is looked up
+GRADE_PATTERN = re.compile(r'^\s*(\S+)')
+
+
+def _code(grade, lookup):
+    if grade in lookup:
+        return lookup[grade]
+    match = GRADE_PATTERN.match(grade)
+    if match and match.group(1) in lookup:
+        return lookup[match.group(1)]
+    return -1
+
+
+def grade_code(grade, boulder=False):
+    """The code of one grade, -1 if it isn't known (e.g. grade_code('7C+', boulder=True) for queries)"""
+    return _code(grade.lower().replace(APPROX_SUFFIX, "").strip(), BOULDER_LOOKUP if boulder else ROUTE_LOOKUP)
+
+
+def is_boulder_code(codes):
+    """True for the codes on the boulder scale"""
+    return np.asarray(codes) >= BOULDER_OFFSET
+
+
+def encode_grades(grades, boulder=False):
+    """Encode a column of grade strings.
+
+    boulder, True or a boolean per grade (e.g. style == 'Boulder'), says which grades are Font
+    boulder grades. Returns a DataFrame with the same index: grade_code as a nullable Int16, the
+    position on the LADDER for route grades and BOULDER_OFFSET + that position for boulder grades
+    (missing for grades that aren't known), and grade_approx, True for grades marked "(approx)".
+    Each distinct (grade, boulder) pair is looked up once.
+    """
+    grades = pd.Series(grades)
+    boulder = np.broadcast_to(np.asarray(boulder, dtype=bool), len(grades))
+    codes, uniques = pd.factorize(grades)
+    uniques = pd.Series(uniques, dtype=object).astype(str).str.lower()
+    approx = uniques.str.contains(APPROX_SUFFIX, regex=False).to_numpy()
+    clean = uniques.str.replace(APPROX_SUFFIX, "", regex=False).str.strip()
+    # one extra entry for the missing values, whose factorize code -1 picks the last element
+    route_codes = np.array([_code(grade, ROUTE_LOOKUP) for grade in clean] + [-1], dtype='int16')
+    boulder_codes = np.array([_code(grade, BOULDER_LOOKUP) for grade in clean] + [-1], dtype='int16')
+    approx = np.append(approx, False)
+
+    values = np.where(boulder, boulder_codes[codes], route_codes[codes])
+    return pd.DataFrame({
+        'grade_code': pd.arrays.IntegerArray(values, mask=values == -1),
+        'grade_approx': approx[codes],
+    }, index=grades.index)
+
+
+def to_categorical(codes):
+    """Grade codes as an ordered categorical of the LADDER then the FONT_LADDER grades.
+
+    It sorts by difficulty within each scale, routes before boulders (the order between the two
+    scales means nothing).
+    """
+    codes = pd.array(codes, dtype='Int16').to_numpy(dtype='int16', na_value=-1)
+    codes = np.where(is_boulder_code(codes), codes - BOULDER_OFFSET + len(LADDER), codes)
+    return pd.Categorical.from_codes(codes, categories=LADDER + FONT_LADDER, ordered=True)
+
+
+def strip_approx(grades):
+    """The grades without their "(approx)" marker"""
+    return pd.Series(grades).str.replace(" " + APPROX_SUFFIX, "", regex=False)
+
+
+def main():
+    # how much of all_grades.txt the lookup table covers
+    with open(GRADES_PATH, 'r', encoding='utf-8') as file:
+        all_grades = pd.Series(file.read().splitlines())
+    encoded = encode_grades(all_grades)
+    unknown = all_grades[encoded['grade_code'].isna()]
+    print(f"{len(all_grades) - len(unknown)} of {len(all_grades)} grades encoded, "
+          f"{encoded['grade_approx'].sum()} approximate")
+    print("Unknown grades:")
+    print(unknown.value_counts())
+
+
+if __name__ == "__main__":
+    main()
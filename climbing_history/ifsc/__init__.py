@@ -0,0 +1 @@
+"""Scraping and analysis of the IFSC bouldering world cup results"""
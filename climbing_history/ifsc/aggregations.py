@@ -0,0 +1,50 @@
+import pandas as pd
+
+
+class Aggregates:
+    """Per-group statistics of the prepared results, computed once per grouping and cached.
+
+    Every grouping is a single groupby with built-in (vectorised) sum, count, size and nunique
+    kernels. Rates and mean attempts are derived from the sums and counts, so no Python function
+    runs per group. The means skip missing attempts, like x[x.notna()].mean() did.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._cache = {}
+
+    def stats(self, by):
+        """Statistics per group of the columns in by, one row per group (by are regular columns)
+
+        Columns: athletes, boulders_attempted, boulders_zoned, boulders_topped, top_success_rate,
+        zone_success_rate, avg_top_attempts, avg_zone_attempts.
+        """
+        key = tuple(by)
+        if key not in self._cache:
+            self._cache[key] = self._compute(list(by))
+        return self._cache[key].copy()
+
+    def _compute(self, by):
+        grouped = self.df.groupby(by, observed=True, sort=True)
+        sums = grouped.agg(
+            athletes=('athlete', 'nunique'),
+            boulders_attempted=('top', 'size'),
+            boulders_zoned=('zone_success', 'sum'),
+            boulders_topped=('top_success', 'sum'),
+            top_total=('top', 'sum'),
+            tops_counted=('top', 'count'),
+            zone_total=('zone', 'sum'),
+            zones_counted=('zone', 'count'),
+        )
+        stats = pd.DataFrame({
+            'athletes': sums['athletes'],
+            'boulders_attempted': sums['boulders_attempted'],
+            'boulders_zoned': sums['boulders_zoned'],
+            'boulders_topped': sums['boulders_topped'],
+            'top_success_rate': sums['boulders_topped'] / sums['boulders_attempted'],
+            'zone_success_rate': sums['boulders_zoned'] / sums['boulders_attempted'],
+            # 0 / 0 gives NaN for groups that never topped (zoned), like the mean of nothing
+            'avg_top_attempts': sums['top_total'] / sums['tops_counted'].where(sums['tops_counted'] > 0),
+            'avg_zone_attempts': sums['zone_total'] / sums['zones_counted'].where(sums['zones_counted'] > 0),
+        })
+        return stats.reset_index()
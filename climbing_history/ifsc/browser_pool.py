@@ -0,0 +1,165 @@
+import functools
+import http.server
+import queue
+import threading
+import time
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.firefox.service import Service
+from selenium.webdriver.firefox.options import Options
+from webdriver_manager.firefox import GeckoDriverManager
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from .. import metrics
+
+WAIT_TIMEOUT = 30 # seconds to wait for the results to be rendered
+READY_CLASS = "r-name" # the page is rendered once an element with this class appears
+
+
+@functools.lru_cache(maxsize=None)
+def _geckodriver_path():
+    # download/locate geckodriver once, not once per browser
+    return GeckoDriverManager().install()
+
+
+def make_firefox_driver():
+    """A new headless Firefox"""
+    options = Options()
+    options.add_argument("--headless")  # Comment this line if you want to see the browser
+    return webdriver.Firefox(service=Service(_geckodriver_path()), options=options)
+
+
+def get_content_page(driver, url, wait_timeout=WAIT_TIMEOUT):
+    # Load the page
+    driver.get(url)
+
+    # Explicit wait: wait until a dynamic element appears (adjust selector accordingly)
+    wait = WebDriverWait(driver, wait_timeout)
+    wait.until(EC.presence_of_element_located((By.CLASS_NAME, READY_CLASS)))
+
+    # Extract the updated page source after JS execution
+    return driver.page_source
+
+
+class BrowserPool:
+    """N headless browsers rendering pages from a shared work queue.
+
+    Each worker thread owns one browser and replaces it after pages_per_browser pages, so the
+    browsers' memory doesn't keep growing, and after any failure. A page that fails is put back
+    on the queue and only taken again by a worker that hasn't failed on it yet (any worker once
+    they all have), up to max_attempts times in total.
+
+    Closing the render() generator early (a break, an exception, Ctrl-C) drops the pages not
+    started yet, so only the pages being rendered at that moment are waited for.
+    """
+
+    def __init__(self, n_workers=4, pages_per_browser=50, max_attempts=3,
+                 wait_timeout=WAIT_TIMEOUT, make_driver=make_firefox_driver):
+        self.n_workers = n_workers
+        self.pages_per_browser = pages_per_browser
+        self.max_attempts = max_attempts
+        self.wait_timeout = wait_timeout
+        self.make_driver = make_driver
+
+    def render(self, links):
+        """Render all links, yields (link, page_source) as pages are done, page_source None once a link gave up"""
+        todo = queue.Queue()
+        done = queue.Queue()
+        for link in links:
+            todo.put((link, ()))  # the link and the workers it already failed on
+        remaining = len(links)
+        stop = threading.Event()
+
+        n_workers = min(self.n_workers, remaining)
+        workers = [threading.Thread(target=self._work, args=(i, n_workers, todo, done, stop), daemon=True)
+                   for i in range(n_workers)]
+        for worker in workers:
+            worker.start()
+        try:
+            while remaining:
+                link, page_source = done.get()
+                remaining -= 1
+                yield link, page_source
+        finally:
+            stop.set()
+            # drop the pages nobody started, so the workers stop after their current page
+            while True:
+                try:
+                    todo.get_nowait()
+                except queue.Empty:
+                    break
+            for _ in workers:
+                todo.put(None)  # wake up the idle workers
+            for worker in workers:
+                worker.join()
+
+    def _work(self, worker_id, n_workers, todo, done, stop):
+        driver = None
+        pages = 0
+        try:
+            while True:
+                job = todo.get()
+                if job is None or stop.is_set():
+                    break
+                link, failed_on = job
+                if worker_id in failed_on and len(set(failed_on)) < n_workers:
+                    # leave it to a worker that hasn't failed on it yet
+                    todo.put(job)
+                    time.sleep(0.1)
+                    continue
+
+                try:
+                    if driver is None or pages >= self.pages_per_browser:
+                        self._quit(driver)
+                        with metrics.timer('browser_start_seconds'):
+                            driver = self.make_driver()
+                        metrics.inc('browsers_started')
+                        pages = 0
+                    pages += 1
+                    with metrics.timer('fetch_seconds', mode='browser'):
+                        page_source = get_content_page(driver, link, self.wait_timeout)
+                except Exception as e:
+                    metrics.inc('render_errors', error=type(e).__name__)
+                    # the browser may be in a bad state, start the next page with a fresh one
+                    self._quit(driver)
+                    driver = None
+                    failed_on = failed_on + (worker_id,)
+                    if len(failed_on) < self.max_attempts:
+                        metrics.inc('render_retries')
+                        todo.put((link, failed_on))
+                    else:
+                        print(f"Something failed for link: {link} ({type(e).__name__}: {e})")
+                        metrics.inc('pages_failed', reason='render')
+                        done.put((link, None))
+                    continue
+                done.put((link, page_source))
+        finally:
+            self._quit(driver)
+
+    @staticmethod
+    def _quit(driver):
+        if driver is not None:
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(directory):
+    """Serve a directory of saved results pages on a local port, returns (base_url, server).
+
+    Used to try the scraper offline: point the links at base_url + file name. Call
+    server.shutdown() when done.
+    """
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/", server
@@ -0,0 +1,374 @@
+import argparse
+import multiprocessing
+import os
+
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+from .aggregations import Aggregates
+from .prepared_data import prepared_data
+from .ratings import RatingModel
+from ..config import data_path
+from ..metrics import export_metrics, stage
+
+# Set up visualization style
+sns.set(style="whitegrid")
+plt.rcParams['figure.figsize'] = (12, 6)
+
+FILEPATHS = [data_path('bouldering_Worldcups_2015_to_2019.csv'),
+             data_path('bouldering_Worldcups_2021_to_2024.csv')]
+ROUND_ORDER = ['Qualification', 'Semi-final', 'Final']
+REPORT_WORKERS = os.cpu_count() # processes drawing the figures in batch mode
+REPORT_TIMEOUT = 600 # seconds, a batch report that takes longer is stopped
+
+
+####################
+# figures
+####################
+
+class BatchReport:
+    """Collects the figures of a run and draws them into output_dir, in parallel, instead of showing them.
+
+    Each figure is a module level plot function and the (small) data it draws, so the worker
+    processes can draw it on their own.
+    """
+
+    def __init__(self, output_dir, workers=REPORT_WORKERS, timeout=REPORT_TIMEOUT):
+        self.output_dir = output_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.figures = []
+
+    def add(self, name, plot, data):
+        self.figures.append((os.path.join(self.output_dir, f"{name}.png"), plot, data))
+
+    def render(self):
+        """Draw all the figures, returns their paths. Raises multiprocessing.TimeoutError past the timeout"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        with multiprocessing.Pool(self.workers or 1, initializer=plt.switch_backend, initargs=('Agg',)) as pool:
+            # leaving the block terminates the workers, also when the timeout hits
+            return pool.map_async(_save_figure, self.figures, chunksize=1).get(self.timeout)
+
+
+def _save_figure(figure):
+    path, plot, data = figure
+    plot(data)
+    plt.savefig(path, bbox_inches='tight')
+    plt.close('all')
+    return path
+
+
+def figure(name, plot, data, report=None):
+    """Draw a figure and show it, or add it to the batch report"""
+    if report is None:
+        plot(data)
+        plt.show(block = True)
+    else:
+        report.add(name, plot, data)
+
+
+def plot_top_success_by_round(df):
+    # Plot success rates by round and discipline
+    plt.figure(figsize=(12, 6))
+    sns.barplot(data=df, x='round', y='top_success', hue='discipline',
+                order=ROUND_ORDER, errorbar=None)
+    plt.title('Top Success Rate by Round and Discipline')
+    plt.ylabel('Success Rate')
+
+
+def plot_top_attempts_by_round(df):
+    # Plot attempts distribution
+    plt.figure(figsize=(12, 6))
+    sns.boxplot(data=df, x='round', y='top', hue='discipline',
+                order=ROUND_ORDER)
+    plt.title('Distribution of Attempts Needed for Top (Successful Attempts Only)')
+
+
+def plot_athlete_performance(athlete_stats):
+    # Plot athlete performance
+    plt.figure(figsize=(12, 6))
+    sns.scatterplot(data=athlete_stats,
+                    x='avg_top_attempts', y='top_success_rate', hue='discipline')
+    plt.title('Athlete Performance: Success Rate vs Average Attempts Needed')
+    plt.xlabel('Average Attempts Needed for Top (when successful)')
+    plt.ylabel('Top Success Rate')
+
+
+def plot_boulder_difficulty(boulder_stats):
+    # Plot boulder difficulty progression through rounds
+    plt.figure(figsize=(12, 6))
+    sns.boxplot(data=boulder_stats, x='round', y='top_success_rate', hue='discipline',
+                order=ROUND_ORDER)
+    plt.title('Boulder Difficulty by Round')
+    plt.ylabel('Top Success Rate')
+
+
+def plot_country_performance(country_stats):
+    # Performance scatter plot
+    plt.figure(figsize=(14, 8))
+    sns.scatterplot(data=country_stats, x='avg_top_attempts', y='top_success_rate',
+                    hue='discipline', size='athletes', sizes=(50, 300))
+    plt.title('Country Performance: Success Rate vs Average Attempts Needed')
+    plt.xlabel('Average Attempts Needed for Top (when successful)')
+    plt.ylabel('Top Success Rate')
+    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.tight_layout()
+
+
+def plot_country_boulders(plot_data):
+    # Stacked bar plot of boulders attempted, zoned, and topped
+    labels = plot_data['country'].astype(str) + " (" + plot_data['discipline'].astype(str) + ")"
+
+    # Create stacked bar plot
+    plt.figure(figsize=(16, 8))
+
+    # Create bars for each segment
+    bars1 = plt.barh(labels,
+                     plot_data['boulders_topped'], color='#2ecc71', label='Topped')
+    bars2 = plt.barh(labels,
+                     plot_data['boulders_zoned_only'], left=plot_data['boulders_topped'],
+                     color='#f39c12', label='Zoned Only')
+    bars3 = plt.barh(labels,
+                     plot_data['boulders_failed_zone'],
+                     left=plot_data['boulders_topped'] + plot_data['boulders_zoned_only'],
+                     color='#e74c3c', label='Failed Zone')
+
+    # Add value labels
+    for bars in [bars1, bars2, bars3]:
+        for bar in bars:
+            width = bar.get_width()
+            if width > 0:
+                plt.text(bar.get_x() + width / 2, bar.get_y() + bar.get_height() / 2,
+                         f'{int(width)}', ha='center', va='center', color='white', fontsize=8)
+
+    plt.xlabel('Number of Boulders')
+    plt.title('Boulder Performance by Country: Attempted, Zoned, and Topped (Top 15 by Attempts)')
+    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.tight_layout()
+
+
+def plot_country_success_rates(plot_data_melted):
+    # Success rate comparison by country
+    plt.figure(figsize=(14, 8))
+    sns.barplot(data=plot_data_melted, x='rate', y='country', hue='metric',
+                palette=['#2ecc71', '#f39c12'])
+    plt.title('Top 15 Countries by Top Success Rate (Comparison with Zone Success)')
+    plt.xlabel('Success Rate')
+    plt.ylabel('Country')
+    plt.xlim(0, 1)
+    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.tight_layout()
+
+
+def plot_yearly_top_success(yearly_stats):
+    # Plot trends
+    plt.figure(figsize=(14, 6))
+    sns.lineplot(data=yearly_stats, x='year', y='top_success_rate', hue='discipline')
+    plt.title('Top Success Rate Over Time')
+
+
+####################
+# analyses
+####################
+
+def general_overview(df):
+    """Print general overview of the dataset"""
+    print("=== GENERAL OVERVIEW ===")
+    print(f"Total records: {len(df)}")
+    print(f"Unique athletes: {df['athlete'].nunique()}")
+    print(f"Unique countries where the athletes are from: {df['country'].nunique()}")
+    print(f"Unique events: {df['event'].nunique()}")
+    # print("\nData types and missing values:")
+    # print(df.info())
+
+    print("\n=== COMPETITION STRUCTURE ===")
+    print("Observations by year:")
+    print(df['year'].value_counts().sort_index())
+
+    print("\nRounds distribution:")
+    print(df['round'].value_counts(normalize=True))
+
+    print("\nDiscipline distribution:")
+    print(df['discipline'].value_counts(normalize=True))
+
+
+def performance_analysis(df, report=None):
+    """Analyze performance metrics"""
+    print("\n=== PERFORMANCE ANALYSIS ===")
+
+    # Success rates
+    print("\nSuccess rates:")
+    print(f"Top success rate: {df['top_success'].mean():.1%}")
+    print(f"Zone success rate: {df['zone_success'].mean():.1%}")
+
+    # Attempts distribution
+    print("\nAttempts distribution for successful tops:")
+    print(df[df['top_success']]['top'].describe(percentiles=[.1, .25, .5, .75, .9]))
+
+    print("\nAttempts distribution for successful zones:")
+    print(df[df['zone_success']]['zone'].describe(percentiles=[.1, .25, .5, .75, .9]))
+
+    figure('top_success_by_round', plot_top_success_by_round,
+           df[['round', 'top_success', 'discipline']], report)
+    figure('top_attempts_by_round', plot_top_attempts_by_round,
+           df.loc[df['top_success'], ['round', 'top', 'discipline']], report)
+
+
+def athlete_analysis(df, aggregates=None, report=None):
+    """Analyze athlete performance"""
+    print("\n=== ATHLETE ANALYSIS ===")
+    aggregates = aggregates or Aggregates(df)
+
+    # Top athletes by success rate (minimum 20 boulders attempted)
+    athlete_stats = aggregates.stats(['athlete', 'country', 'discipline'])[
+        ['athlete', 'country', 'discipline', 'boulders_attempted', 'top_success_rate',
+         'avg_top_attempts', 'avg_zone_attempts']]
+
+    top_athletes = athlete_stats[athlete_stats['boulders_attempted'] >= 20].sort_values(
+        'top_success_rate', ascending=False).head(10)
+
+    print("\nTop 10 athletes by success rate (min 20 boulders):")
+    print(top_athletes)
+
+    figure('athlete_performance', plot_athlete_performance,
+           athlete_stats[athlete_stats['boulders_attempted'] >= 20], report)
+
+
+def boulder_analysis(df, aggregates=None, report=None):
+    """Analyze boulder difficulty"""
+    print("\n=== BOULDER ANALYSIS ===")
+    aggregates = aggregates or Aggregates(df)
+
+    boulder_stats = aggregates.stats(['event', 'round', 'discipline', 'boulder']).rename(
+        columns={'boulders_attempted': 'attempts'})[
+        ['event', 'round', 'discipline', 'boulder', 'attempts', 'top_success_rate',
+         'zone_success_rate', 'avg_top_attempts', 'avg_zone_attempts']]
+
+    # Hardest boulders (lowest success rate, minimum 20 attempts)
+    hardest_boulders = boulder_stats[boulder_stats['attempts'] >= 20].sort_values(
+        'top_success_rate').head(10)
+
+    print("\nTop 10 hardest boulders (lowest success rate):")
+    print(hardest_boulders[['event', 'round', 'discipline', 'boulder', 'attempts', 'top_success_rate']])
+
+    figure('boulder_difficulty', plot_boulder_difficulty, boulder_stats, report)
+
+
+def rating_analysis(df, model=None):
+    """Rank athletes and boulders by the joint ability / difficulty model, which accounts for who tried what"""
+    print("\n=== RATINGS (athlete ability and boulder difficulty fitted jointly) ===")
+    model = model or RatingModel().fit(df)
+    print(f"Fitted {len(model.athletes)} athletes and {len(model.boulders)} boulders in {model.iterations} iterations")
+
+    abilities = model.abilities()
+    abilities['discipline'] = abilities['athlete'].map(df.groupby('athlete', observed=True)['discipline'].first())
+    for discipline, discipline_abilities in abilities.groupby('discipline', observed=True):
+        print(f"\nTop 10 athletes by ability, {discipline} (minimum 20 boulders):")
+        print(discipline_abilities[discipline_abilities['boulders'] >= 20].head(10)[['athlete', 'ability', 'boulders']])
+
+    difficulties = model.difficulties()
+    print("\nTop 10 hardest boulders to top (minimum 20 athletes):")
+    print(difficulties[difficulties['athletes'] >= 20].head(10)[['discipline', 'boulder', 'top_difficulty', 'athletes']])
+    return model
+
+
+def country_analysis(df, aggregates=None, report=None):
+    """Analyze country performance with enhanced visualizations"""
+    print("\n=== COUNTRY ANALYSIS ===")
+    aggregates = aggregates or Aggregates(df)
+
+    # Calculate country statistics
+    country_stats = aggregates.stats(['country', 'discipline'])
+
+    # Filter countries with at least 50 boulders attempted
+    country_stats = country_stats[country_stats['boulders_attempted'] >= 50]
+
+    print("\nCountry performance (min 50 boulders attempted):")
+    print(country_stats.sort_values('top_success_rate', ascending=False))
+
+    # 1. Performance scatter plot
+    figure('country_performance', plot_country_performance, country_stats, report)
+
+    # 2. Stacked bar plot of boulders attempted, zoned, and topped
+    # Prepare data for plotting
+    plot_data = country_stats.sort_values('boulders_attempted', ascending=False).head(15)
+    plot_data['boulders_failed_zone'] = plot_data['boulders_attempted'] - plot_data['boulders_zoned']
+    plot_data['boulders_zoned_only'] = plot_data['boulders_zoned'] - plot_data['boulders_topped']
+    figure('country_boulders', plot_country_boulders, plot_data, report)
+
+    # 3. Success rate comparison by country
+    plot_data = country_stats.sort_values('top_success_rate', ascending=False).head(15)
+    plot_data_melted = plot_data.melt(id_vars=['country', 'discipline'],
+                                      value_vars=['top_success_rate', 'zone_success_rate'],
+                                      var_name='metric', value_name='rate')
+    plot_data_melted['metric'] = plot_data_melted['metric'].replace({
+        'top_success_rate': 'Top Success',
+        'zone_success_rate': 'Zone Success'
+    })
+    figure('country_success_rates', plot_country_success_rates, plot_data_melted, report)
+
+
+def temporal_analysis(df, aggregates=None, report=None):
+    """Analyze performance trends over time"""
+    print("\n=== TEMPORAL ANALYSIS ===")
+
+    # the year is extracted from the event names when the data is prepared (see prepared_data.py)
+    if df['year'].notna().any():
+        aggregates = aggregates or Aggregates(df)
+        yearly_stats = aggregates.stats(['year', 'discipline'])[
+            ['year', 'discipline', 'top_success_rate', 'avg_top_attempts']]
+
+        print("\nPerformance trends by year:")
+        print(yearly_stats.pivot(index='year', columns='discipline',
+                                 values=['top_success_rate', 'avg_top_attempts']))
+
+        figure('yearly_top_success', plot_yearly_top_success, yearly_stats, report)
+    else:
+        print("Could not extract year from event names for temporal analysis")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Analysis of the IFSC bouldering world cup results")
+    arg_parser.add_argument('filepaths', nargs='*', default=FILEPATHS, help="result files (csv or parquet)")
+    arg_parser.add_argument('--batch', metavar='OUTPUT_DIR',
+                            help="don't show the figures, save them as png files in OUTPUT_DIR")
+    arg_parser.add_argument('--workers', type=int, default=REPORT_WORKERS, help="processes drawing the figures")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="prepare the data from the result files even if it's in the prepared data cache")
+    arg_parser.add_argument('--timeout', type=float, default=REPORT_TIMEOUT,
+                            help="seconds the figures may take in batch mode")
+    args = arg_parser.parse_args(argv)
+
+    report = None
+    if args.batch:
+        plt.switch_backend('Agg') # no display needed, e.g. when run from cron
+        report = BatchReport(args.batch, workers=args.workers, timeout=args.timeout)
+
+    with stage('load'):
+        df = prepared_data(args.filepaths, use_cache=not args.no_cache)
+    aggregates = Aggregates(df) # the group statistics shared by the analyses
+
+    # Run analyses
+    with stage('analyses'):
+        general_overview(df)
+        performance_analysis(df, report)
+        athlete_analysis(df, aggregates, report)
+        boulder_analysis(df, aggregates, report)
+        rating_analysis(df)
+        country_analysis(df, aggregates, report)
+        temporal_analysis(df, aggregates, report)
+
+    if report is not None:
+        try:
+            with stage('report'):
+                paths = report.render()
+        except multiprocessing.TimeoutError:
+            raise SystemExit(f"The figures took longer than {args.timeout}s, stopped")
+        print(f"\n{len(paths)} figures saved in {args.batch}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        export_metrics('general_analysis_ifsc_bouldering')
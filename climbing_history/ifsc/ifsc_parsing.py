@@ -0,0 +1,201 @@
+import argparse
+import glob
+
+import pandas as pd
+from bs4 import BeautifulSoup
+import lxml.html
+
+from ..parsing import _lxml_text
+
+# html extraction backend: 'lxml' (C parser, fast) or 'bs4' (BeautifulSoup with html.parser)
+# both return the same records, run this file with --compare to check it on saved pages
+BACKEND = 'lxml'
+BACKENDS = ('lxml', 'bs4')
+
+# the columns of a parsed results page, in order
+RESULT_COLUMNS = ['athlete', 'country', 'boulder', 'zone', 'top', 'event', 'round', 'discipline']
+
+
+def parse_ifsc_results(html, backend=None):
+    data = extract_ifsc_records(html, backend)
+
+    # Create DataFrame with specified column order
+    df = pd.DataFrame(data)
+    if not df.empty:
+        # Convert numeric columns
+        df['top'] = pd.to_numeric(df['top'], errors='coerce')
+        df['zone'] = pd.to_numeric(df['zone'], errors='coerce')
+        # Reorder columns
+        df = df[RESULT_COLUMNS]
+    return df
+
+
+def extract_ifsc_records(html, backend=None):
+    """One dict per athlete and boulder of a rendered IFSC results page"""
+    backend = backend or BACKEND
+    if backend not in EXTRACTORS:
+        raise ValueError(f"Unknown extraction backend {backend!r}, pick one of {BACKENDS}")
+    return EXTRACTORS[backend](html)
+
+
+def _bs4_records(html):
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Extract event, discipline, and round
+    event_name = soup.find('div', class_='event-name').text.strip()
+    discipline = soup.find_all('div', class_='dcat-row')[1].text.strip()
+    round_name = soup.find('div', class_='round-name').text.strip()
+
+    table = soup.find('table')
+    rows = table.find_all('tr')
+
+    data = []
+    current_athlete = {}
+
+    for row in rows:
+        if 'r-row' in row.get('class', []):
+            # Extract athlete information
+            current_athlete = {}
+            current_athlete['athlete'] = row.find('a', class_='r-name').get_text(strip=True)
+            country = row.find('div', class_ = "r-name-sub").get_text().split(' • ')[-1]
+            current_athlete['country'] = country
+            current_athlete['event'] = event_name
+            current_athlete['round'] = round_name
+            current_athlete['discipline'] = discipline
+
+        elif 'boulder-asc-detail' in row.get('class', []):
+            # Extract boulder details
+            boulders = row.find_all('div', class_='asc-cell-container')
+            for boulder in boulders:
+                boulder_data = current_athlete.copy()
+
+                # Get boulder identifier
+                boulder_num = boulder.find('div', class_='asc-route-name').get_text(strip=True)
+                boulder_data['boulder'] = f"{event_name}-{round_name}-{boulder_num}"
+
+                # Get attempts
+                cell = boulder.find('div', class_='asc-cell')
+                top = cell.find('div', class_='top')
+                zone = cell.find('div', class_='zone')
+
+                boulder_data['top'] = top.find('span').get_text(strip=True) if 'topped' in top.get('class',
+                                                                                                   []) else None
+                boulder_data['zone'] = zone.find('span').get_text(strip=True) if 'zoned' in zone.get('class',
+                                                                                                     []) else None
+
+                data.append(boulder_data)
+    return data
+
+
+####################
+# lxml backend
+####################
+
+def _classes(element):
+    return element.get('class', '').split()
+
+
+def _by_class(element, tag, css_class):
+    """Descendants with the given tag and css class, in document order"""
+    return element.xpath(f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), $css)]",
+                         css=f" {css_class} ")
+
+
+def _first_by_class(element, tag, css_class):
+    found = _by_class(element, tag, css_class)
+    if not found:
+        raise AttributeError(f"no <{tag} class='{css_class}'>")
+    return found[0]
+
+
+def _lxml_records(html):
+    tree = lxml.html.document_fromstring(html)
+
+    event_name = _lxml_text(_first_by_class(tree, 'div', 'event-name')).strip()
+    discipline = _lxml_text(_by_class(tree, 'div', 'dcat-row')[1]).strip()
+    round_name = _lxml_text(_first_by_class(tree, 'div', 'round-name')).strip()
+
+    table = tree.find('.//table')
+    rows = table.findall('.//tr')
+
+    data = []
+    current_athlete = {}
+
+    for row in rows:
+        classes = _classes(row)
+        if 'r-row' in classes:
+            current_athlete = {
+                'athlete': _lxml_text(_first_by_class(row, 'a', 'r-name'), strip=True),
+                'country': _lxml_text(_first_by_class(row, 'div', 'r-name-sub')).split(' • ')[-1],
+                'event': event_name,
+                'round': round_name,
+                'discipline': discipline,
+            }
+
+        elif 'boulder-asc-detail' in classes:
+            for boulder in _by_class(row, 'div', 'asc-cell-container'):
+                boulder_data = current_athlete.copy()
+
+                boulder_num = _lxml_text(_first_by_class(boulder, 'div', 'asc-route-name'), strip=True)
+                boulder_data['boulder'] = f"{event_name}-{round_name}-{boulder_num}"
+
+                cell = _first_by_class(boulder, 'div', 'asc-cell')
+                top = _first_by_class(cell, 'div', 'top')
+                zone = _first_by_class(cell, 'div', 'zone')
+
+                boulder_data['top'] = _lxml_text(top.find('.//span'), strip=True) if 'topped' in _classes(top) else None
+                boulder_data['zone'] = _lxml_text(zone.find('.//span'), strip=True) if 'zoned' in _classes(zone) else None
+
+                data.append(boulder_data)
+    return data
+
+
+EXTRACTORS = {'bs4': _bs4_records, 'lxml': _lxml_records}
+
+
+####################
+# comparison mode
+####################
+
+def compare_backends(pages, backends=BACKENDS):
+    """Run every backend over the pages, a list of (name, html), and return the differences.
+
+    Each difference is (name, {backend: records}). A backend raising counts as a result.
+    """
+    differences = []
+    for name, html in pages:
+        results = {}
+        for backend in backends:
+            try:
+                results[backend] = extract_ifsc_records(html, backend)
+            except Exception as e:
+                results[backend] = f"{type(e).__name__}: {e}"
+        if any(result != results[backends[0]] for result in results.values()):
+            differences.append((name, results))
+    return differences
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Diff the IFSC records extracted by the html backends")
+    arg_parser.add_argument('--compare', nargs='+', metavar='HTML_FILE',
+                            help="saved results pages (globs are expanded) to compare the backends over")
+    args = arg_parser.parse_args(argv)
+    if not args.compare:
+        arg_parser.print_help()
+        return
+
+    paths = [path for pattern in args.compare for path in sorted(glob.glob(pattern))]
+    pages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as file:
+            pages.append((path, file.read()))
+    differences = compare_backends(pages)
+    for name, results in differences:
+        print(f"records differ for {name}")
+        for backend, result in results.items():
+            print(f"  {backend}: {result if isinstance(result, str) else f'{len(result)} records'}")
+    print(f"{len(differences)} differences over {len(pages)} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import sqlite3
+import time
+import zlib
+
+
+class PageArchive:
+    """Every rendered results page, zlib-compressed in one SQLite file.
+
+    Pages are keyed by competition URL and scrape time, so re-rendering a competition adds a
+    version instead of replacing the old one. The pages can be parsed again at any time without
+    starting a browser (see --offline in scrape_ifsc_bouldering.py).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS pages (
+            url TEXT NOT NULL,
+            scraped_at REAL NOT NULL,
+            html BLOB NOT NULL,
+            PRIMARY KEY (url, scraped_at))""")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def add(self, url, page_source, scraped_at=None):
+        scraped_at = time.time() if scraped_at is None else scraped_at
+        self.db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+                        (url, scraped_at, zlib.compress(page_source.encode('utf-8'))))
+        self.db.commit()
+
+    def get(self, url, scraped_at=None):
+        """The page source of url, the latest version unless scraped_at is given, None if not archived"""
+        if scraped_at is None:
+            row = self.db.execute("SELECT html FROM pages WHERE url = ? ORDER BY scraped_at DESC LIMIT 1",
+                                  (url,)).fetchone()
+        else:
+            row = self.db.execute("SELECT html FROM pages WHERE url = ? AND scraped_at = ?",
+                                  (url, scraped_at)).fetchone()
+        return None if row is None else decompress_page(row[0])
+
+    def versions(self, url):
+        """The scrape times of url, oldest first"""
+        return [row[0] for row in self.db.execute(
+            "SELECT scraped_at FROM pages WHERE url = ? ORDER BY scraped_at", (url,))]
+
+    def urls(self):
+        return [row[0] for row in self.db.execute("SELECT DISTINCT url FROM pages ORDER BY url")]
+
+    def latest_compressed(self, urls=None):
+        """Yield (url, compressed page) for the latest version of every archived page (or of the urls)"""
+        wanted = None if urls is None else set(urls)
+        for url, html in self.db.execute("""SELECT url, html FROM pages AS p WHERE scraped_at = (
+                SELECT MAX(scraped_at) FROM pages WHERE url = p.url) ORDER BY url"""):
+            if wanted is None or url in wanted:
+                yield url, html
+
+
+def decompress_page(compressed):
+    return zlib.decompress(compressed).decode('utf-8')
@@ -0,0 +1,84 @@
+import hashlib
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+
+from . import results_loader
+from .results_loader import YEAR_PATTERN, load_results
+from ..datasets import dataset_exists, dataset_path, read_dataset, write_dataset
+from ..metrics import inc
+
+# the prepared frames are stored as the datasets ifsc_prepared/<fingerprint>, the most recent
+# KEEP_PREPARED of them are kept
+PREPARED_DATASET = 'ifsc_prepared'
+KEEP_PREPARED = 4
+# the code the prepared frame depends on, editing any of these files invalidates the cache
+PREPARATION_MODULES = [results_loader.__file__, __file__]
+
+
+def load_and_prepare_data(filepaths, seasons=None):
+    """Load and prepare the data"""
+
+    # typed in one pass: categorical strings, Int16 attempts (see results_loader.py)
+    df = load_results(filepaths, seasons=seasons)
+
+    #fix rounds flags
+    df['round'] = df['round'].map(lambda r: 'Semi-final' if r == 'Semi-Final' else r).astype('category')
+
+    # the season, extracted once per distinct event name
+    years = df['event'].cat.categories.str.extract(YEAR_PATTERN)[0].astype('float').astype('Int16')
+    df['year'] = pd.array(years.to_numpy()[df['event'].cat.codes], dtype='Int16')
+    df.loc[df['event'].isna(), 'year'] = pd.NA
+
+    # Create success flags
+    df['top_success'] = df['top'].notna()
+    df['zone_success'] = df['zone'].notna()
+
+    # Create performance metrics
+    df['total_attempts'] = df['top'].fillna(99)  # 99 represents failed attempts
+    df['attempts_diff'] = df['top'] - df['zone']
+
+    return df
+
+
+def _update_with_file(digest, path):
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+
+
+def fingerprint(filepaths, seasons=None):
+    """Hash of the result files' contents, the preparation code and the arguments"""
+    digest = hashlib.sha256()
+    for path in list(filepaths) + PREPARATION_MODULES:
+        _update_with_file(digest, path)
+        digest.update(b'\0')
+    seasons = sorted(str(season) for season in seasons) if seasons is not None else None
+    digest.update(repr((seasons, pd.__version__, pa.__version__)).encode())
+    return digest.hexdigest()[:16]
+
+
+def prepared_data(filepaths, seasons=None, use_cache=True):
+    """load_and_prepare_data, read from the cache when the files and the code haven't changed since it was stored"""
+    if not use_cache:
+        return load_and_prepare_data(filepaths, seasons)
+    name = f"{PREPARED_DATASET}/{fingerprint(filepaths, seasons)}"
+    if dataset_exists(name):
+        inc('prepared_cache', result='hit')
+        return read_dataset(name)
+
+    inc('prepared_cache', result='miss')
+    df = load_and_prepare_data(filepaths, seasons)
+    write_dataset(df, name)
+    _prune(KEEP_PREPARED)
+    return df
+
+
+def _prune(keep):
+    """Delete all but the keep most recently written prepared frames"""
+    directory = dataset_path(PREPARED_DATASET)
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if not name.endswith('.tmp')]
+    for path in sorted(paths, key=os.path.getmtime, reverse=True)[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
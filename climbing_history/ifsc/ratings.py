@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.optimize import minimize
+from scipy.special import expit
+
+L2 = 1.0 # ridge penalty, a standard normal prior on every parameter (it also pins down the scale's origin)
+MAX_ITERATIONS = 1000
+TOLERANCE = 1e-5 # on the largest gradient component
+OUTCOMES = ['zone', 'top'] # every boulder is two items: reaching its zone and topping it
+
+
+def _factorize(df, keys):
+    """Codes of the rows' key combinations and the distinct keys (an Index, a MultiIndex for several keys)"""
+    codes = np.zeros(len(df), dtype='int64')
+    for key in keys:
+        key_codes, key_values = pd.factorize(df[key]) # fast on the categorical columns
+        codes = codes * len(key_values) + key_codes
+    codes, combinations = pd.factorize(codes)
+    # the distinct keys are read off the first row of every combination
+    first_rows = np.empty(len(combinations), dtype='int64')
+    first_rows[codes[::-1]] = np.arange(len(df))[::-1]
+    values = df[keys].iloc[first_rows].astype(str)
+    if len(keys) == 1:
+        return codes, pd.Index(values[keys[0]].to_numpy(), name=keys[0])
+    return codes, pd.MultiIndex.from_frame(values)
+
+
+class RatingModel:
+    """Athlete ability and boulder difficulty fitted jointly on all the athlete x boulder results.
+
+    A Rasch (one parameter logistic IRT, i.e. Bradley-Terry between athlete and boulder) model:
+    the chance that athlete a reaches the zone of boulder b is sigmoid(ability[a] - zone_difficulty[b]),
+    and the chance of topping it sigmoid(ability[a] - top_difficulty[b]). A boulder's difficulty
+    therefore accounts for who tried it, and an athlete's ability for what they tried.
+
+    Every result is a row of a sparse design matrix with +1 in the athlete's column and -1 in the
+    item's, so the log likelihood and its gradient are two sparse matrix products, and L-BFGS fits
+    all the parameters at once. Boulders are keyed by (discipline, boulder) when there's a
+    discipline column, the boulder names repeat between the men's and the women's rounds.
+
+    fit(df, warm_start=model) starts from another model's parameters (new athletes and boulders
+    from 0), so refitting after an event is appended takes a fraction of the iterations, see update().
+    """
+
+    def __init__(self, l2=L2, max_iterations=MAX_ITERATIONS, tolerance=TOLERANCE):
+        self.l2 = l2
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+
+    def fit(self, df, warm_start=None):
+        """Fit on a results frame with athlete, boulder, zone and top (attempts, missing = not reached)"""
+        keys = ['discipline', 'boulder'] if 'discipline' in df else ['boulder']
+        df = df[df['athlete'].notna() & df[keys].notna().all(axis=1)]
+        athlete_codes, athletes = _factorize(df, ['athlete'])
+        boulder_codes, boulders = _factorize(df, keys)
+        n_athletes, n_boulders = len(athletes), len(boulders)
+
+        # one row per result and outcome: +1 in the athlete's column, -1 in the item's
+        # (the columns are the abilities, then the zone and the top difficulties of the boulders)
+        n = len(df)
+        rows = np.arange(2 * n)
+        athlete_columns = np.tile(athlete_codes, 2)
+        item_columns = n_athletes + np.concatenate([boulder_codes, n_boulders + boulder_codes])
+        design = sp.csr_matrix(
+            (np.concatenate([np.ones(2 * n), -np.ones(2 * n)]),
+             (np.concatenate([rows, rows]), np.concatenate([athlete_columns, item_columns]))),
+            shape=(2 * n, n_athletes + 2 * n_boulders))
+        design_t = design.T
+        outcomes = np.concatenate([df['zone'].notna().to_numpy(), df['top'].notna().to_numpy()]).astype(float)
+
+        def objective(w):
+            # negative log likelihood of the logistic model plus the ridge penalty, and its gradient
+            z = design @ w
+            softplus = np.maximum(z, 0) + np.log1p(np.exp(-np.abs(z))) # log(1 + e^z) without overflow
+            loss = np.sum(softplus - outcomes * z) + 0.5 * self.l2 * w @ w
+            gradient = design_t @ (expit(z) - outcomes) + self.l2 * w
+            return loss, gradient
+
+        w0 = self._initial_parameters(athletes, boulders, warm_start)
+        result = minimize(objective, w0, jac=True, method='L-BFGS-B',
+                          options={'maxiter': self.max_iterations, 'gtol': self.tolerance})
+
+        self.athletes = athletes
+        self.boulders = boulders
+        self.ability = result.x[:n_athletes]
+        self.zone_difficulty = result.x[n_athletes:n_athletes + n_boulders]
+        self.top_difficulty = result.x[n_athletes + n_boulders:]
+        self.athlete_results = np.bincount(athlete_codes, minlength=n_athletes)
+        self.boulder_results = np.bincount(boulder_codes, minlength=n_boulders)
+        self.iterations = result.nit
+        self.converged = result.success
+        return self
+
+    def update(self, df):
+        """Refit on df (the results so far plus the new ones) starting from the current parameters"""
+        return self.fit(df, warm_start=self)
+
+    def _initial_parameters(self, athletes, boulders, warm_start):
+        if warm_start is None:
+            return np.zeros(len(athletes) + 2 * len(boulders))
+        ability = pd.Series(warm_start.ability, index=warm_start.athletes).reindex(athletes)
+        zone = pd.Series(warm_start.zone_difficulty, index=warm_start.boulders).reindex(boulders)
+        top = pd.Series(warm_start.top_difficulty, index=warm_start.boulders).reindex(boulders)
+        # the athletes and boulders the other model hasn't seen start from 0
+        return np.nan_to_num(np.concatenate([ability.to_numpy(), zone.to_numpy(), top.to_numpy()]).astype(float))
+
+    def abilities(self):
+        """One row per athlete, strongest first: athlete, ability, boulders (results fitted)"""
+        return pd.DataFrame({'athlete': self.athletes, 'ability': self.ability,
+                             'boulders': self.athlete_results}).sort_values('ability', ascending=False,
+                                                                              ignore_index=True)
+
+    def difficulties(self):
+        """One row per boulder, hardest top first: the boulder's keys, zone_difficulty, top_difficulty, athletes"""
+        df = self.boulders.to_frame(index=False)
+        df['zone_difficulty'] = self.zone_difficulty
+        df['top_difficulty'] = self.top_difficulty
+        df['athletes'] = self.boulder_results
+        return df.sort_values('top_difficulty', ascending=False, ignore_index=True)
+
+    def predict(self, athletes, boulders, outcome='top'):
+        """Chance that each athlete reaches the outcome ('zone' or 'top') on the matching boulder.
+
+        boulders are keys like the fitted ones ((discipline, boulder) tuples when fitted with a
+        discipline), NaN for athletes or boulders the model hasn't seen.
+        """
+        if outcome not in OUTCOMES:
+            raise ValueError(f"Unknown outcome {outcome!r}, pick one of {OUTCOMES}")
+        difficulty = self.zone_difficulty if outcome == 'zone' else self.top_difficulty
+        ability = pd.Series(self.ability, index=self.athletes).reindex(athletes).to_numpy()
+        difficulty = pd.Series(difficulty, index=self.boulders).reindex(boulders).to_numpy()
+        return expit(ability - difficulty)
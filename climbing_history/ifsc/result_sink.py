@@ -0,0 +1,89 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .ifsc_parsing import RESULT_COLUMNS
+
+# the fixed schema of the scraped results, attempts are small nullable integers (None = not reached)
+SCHEMA = pa.schema([
+    ('athlete', pa.string()),
+    ('country', pa.string()),
+    ('boulder', pa.string()),
+    ('zone', pa.int16()),
+    ('top', pa.int16()),
+    ('event', pa.string()),
+    ('round', pa.string()),
+    ('discipline', pa.string()),
+])
+CHUNK_ROWS = 10000 # rows buffered before they are written out
+
+
+class ResultSink:
+    """Append parsed result rows to a .parquet or .csv file, CHUNK_ROWS at a time.
+
+    Only the current chunk is held in memory. Every chunk is a row group of the parquet file, or
+    is appended to the csv file and flushed, so a crashed scrape keeps the rows written so far
+    (a parquet file is only readable once the sink is closed, use csv for crash safety).
+    Use it as a context manager.
+    """
+
+    def __init__(self, path, chunk_rows=CHUNK_ROWS):
+        self.path = path
+        self.format = os.path.splitext(path)[1].lower().lstrip('.')
+        if self.format not in ('parquet', 'csv'):
+            raise ValueError(f"Can't write results to {path!r}, use a .parquet or .csv file")
+        self.chunk_rows = chunk_rows
+        self.rows_written = 0
+        self._buffer = []
+        self._buffered_rows = 0
+        self._parquet_writer = None
+        self._csv_started = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, df):
+        """Add the rows of a parsed results page"""
+        if df.empty:
+            return
+        self._buffer.append(df)
+        self._buffered_rows += len(df)
+        if self._buffered_rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        chunk = pd.concat(self._buffer, ignore_index=True).reindex(columns=RESULT_COLUMNS)
+        self._buffer = []
+        self._buffered_rows = 0
+        chunk['zone'] = pd.to_numeric(chunk['zone'], errors='coerce').astype('Int16')
+        chunk['top'] = pd.to_numeric(chunk['top'], errors='coerce').astype('Int16')
+
+        if self.format == 'parquet':
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, SCHEMA)
+            self._parquet_writer.write_table(pa.Table.from_pandas(chunk, schema=SCHEMA, preserve_index=False))
+        else:
+            with open(self.path, 'w' if not self._csv_started else 'a', encoding='utf-8', newline='') as file:
+                chunk.to_csv(file, index=False, header=not self._csv_started)
+            self._csv_started = True
+        self.rows_written += len(chunk)
+
+    def close(self):
+        self.flush()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        elif self.rows_written == 0:
+            # no rows at all, still leave a file with the columns
+            if self.format == 'parquet':
+                pq.write_table(SCHEMA.empty_table(), self.path)
+            elif not self._csv_started:
+                pd.DataFrame(columns=RESULT_COLUMNS).to_csv(self.path, index=False)
+                self._csv_started = True
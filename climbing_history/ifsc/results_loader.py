@@ -0,0 +1,65 @@
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+# the declared types of the scraped result files (csv or parquet): the strings are loaded as
+# categoricals, the attempts as small nullable integers (missing = not reached)
+SCHEMA = pa.schema([
+    ('athlete', pa.string()),
+    ('country', pa.string()),
+    ('boulder', pa.string()),
+    ('zone', pa.int16()),
+    ('top', pa.int16()),
+    ('event', pa.string()),
+    ('round', pa.string()),
+    ('discipline', pa.string()),
+])
+YEAR_PATTERN = re.compile(r'(\d{4})') # the season is the first 4 digit number in the event name
+
+
+def load_results(filepaths, columns=None, seasons=None, schema=SCHEMA):
+    """Load the result files into one typed frame.
+
+    The files are read in one pass straight into arrow with the declared schema, only the columns
+    asked for (all by default) and only the events of the given seasons (years, all by default).
+    String columns come out as pandas categoricals and int16 columns as nullable Int16.
+    """
+    columns = list(columns) if columns is not None else schema.names
+    schema = pa.schema([schema.field(name) for name in columns])
+    seasons = None if seasons is None else {str(season) for season in seasons}
+    if seasons is not None and 'event' not in columns:
+        raise ValueError("Filtering on seasons needs the 'event' column")
+
+    tables = [_read_file(path, schema, seasons) for path in filepaths]
+    table = pa.concat_tables(tables) if tables else schema.empty_table()
+
+    # dictionary encode the strings, to_pandas turns them into categoricals
+    for i, field in enumerate(table.schema):
+        if pa.types.is_string(field.type):
+            table = table.set_column(i, field.name, pc.dictionary_encode(table.column(i)))
+    return table.to_pandas(types_mapper={pa.int16(): pd.Int16Dtype()}.get)
+
+
+def _read_file(path, schema, seasons):
+    if os.path.splitext(path)[1].lower() == '.parquet':
+        table = pq.read_table(path, columns=schema.names)
+    else:
+        # older files hold the attempts as floats ("2.0"), read them as such and cast below
+        column_types = {field.name: pa.float64() if pa.types.is_integer(field.type) else field.type
+                        for field in schema}
+        table = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(
+            column_types=column_types, include_columns=schema.names, strings_can_be_null=True))
+    table = table.select(schema.names).cast(schema)
+
+    if seasons is not None:
+        # match the years on the distinct event names only
+        events = pc.dictionary_encode(table.column('event')).combine_chunks()
+        in_seasons = [bool(match) and match.group(1) in seasons
+                      for match in (YEAR_PATTERN.search(event or '') for event in events.dictionary.to_pylist())]
+        table = table.filter(pc.fill_null(pc.take(pa.array(in_seasons), events.indices), False))
+    return table
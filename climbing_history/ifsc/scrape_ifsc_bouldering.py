@@ -0,0 +1,115 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from tqdm import tqdm
+
+from ..config import data_path
+from ..metrics import export_metrics, inc, stage, timer
+from .ifsc_parsing import parse_ifsc_results
+from .page_archive import PageArchive, decompress_page
+from .result_sink import ResultSink
+
+LINKS_PATH = data_path('bouldering_wc_links_201519.txt')
+# .csv or .parquet, the rows are written out in chunks while the scrape runs
+OUTPUT_PATH = data_path('bouldering_Worldcups_2015_to_2019.csv')
+N_BROWSERS = 4 # headless browsers rendering pages in parallel
+PAGES_PER_BROWSER = 50 # each browser is replaced after this many pages
+# every rendered page is kept here, --offline parses the archived pages again without any browser
+ARCHIVE_PATH = data_path('ifsc_pages.sqlite')
+WORKERS = os.cpu_count() # processes parsing the archived pages in offline mode
+
+
+def scrape_results(all_comp_links, sink, archive, n_browsers=N_BROWSERS, pages_per_browser=PAGES_PER_BROWSER):
+    """Render, archive and parse every results page into the sink, returns the failed links"""
+    from .browser_pool import BrowserPool # selenium is only needed when pages are rendered, not offline
+    pool = BrowserPool(n_workers=n_browsers, pages_per_browser=pages_per_browser)
+    failed_links = []
+    for link, page_source in tqdm(pool.render(all_comp_links), total=len(all_comp_links)):
+        if page_source is None:
+            failed_links.append(link)
+            continue
+        inc('http_bytes', len(page_source.encode('utf-8')))
+        with timer('stage_seconds', stage='archive'):
+            archive.add(link, page_source)
+        try:
+            with timer('stage_seconds', stage='parse'):
+                df = parse_ifsc_results(page_source)
+        except:
+            print(f"Something failed for link: {link}")
+            inc('pages_failed', reason='parse')
+            failed_links.append(link)
+            continue
+        with timer('stage_seconds', stage='write'):
+            sink.write(df)
+    return failed_links
+
+
+def _parse_archived_page(job):
+    link, compressed = job
+    try:
+        return link, parse_ifsc_results(decompress_page(compressed))
+    except:
+        return link, None
+
+
+def reparse_archive(archive, sink, links=None, workers=WORKERS):
+    """Parse the latest archived version of every page (or of the links) into the sink, returns the failed links"""
+    jobs = archive.latest_compressed(links)
+    failed_links = []
+    with ProcessPoolExecutor(max_workers=workers or 1) as executor:
+        for link, df in tqdm(executor.map(_parse_archived_page, jobs, chunksize=8)):
+            if df is None:
+                print(f"Something failed for link: {link}")
+                inc('pages_failed', reason='parse')
+                failed_links.append(link)
+                continue
+            sink.write(df)
+    return failed_links
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Scrape the IFSC bouldering world cup results")
+    arg_parser.add_argument('--links', default=LINKS_PATH, help="file with one results page link per line")
+    arg_parser.add_argument('--output', default=OUTPUT_PATH)
+    arg_parser.add_argument('--browsers', type=int, default=N_BROWSERS)
+    arg_parser.add_argument('--pages-per-browser', type=int, default=PAGES_PER_BROWSER)
+    arg_parser.add_argument('--fixtures', metavar='DIR',
+                            help="render the saved .html pages in DIR from a local server instead of the links")
+    arg_parser.add_argument('--archive', default=ARCHIVE_PATH, help="sqlite archive of the rendered pages")
+    arg_parser.add_argument('--offline', action='store_true',
+                            help="parse the archived pages again instead of rendering anything")
+    arg_parser.add_argument('--workers', type=int, default=WORKERS, help="parser processes in offline mode")
+    args = arg_parser.parse_args(argv)
+
+    archive = PageArchive(args.archive)
+    if args.offline:
+        with ResultSink(args.output) as sink, stage('reparse'):
+            failed_links = reparse_archive(archive, sink, workers=args.workers)
+    else:
+        server = None
+        if args.fixtures:
+            from .browser_pool import serve_fixtures
+            base_url, server = serve_fixtures(args.fixtures)
+            all_comp_links = [base_url + name for name in sorted(os.listdir(args.fixtures)) if name.endswith('.html')]
+        else:
+            with open(args.links, 'r', encoding='utf-8') as file:
+                all_comp_links = file.read().splitlines()
+
+        try:
+            with ResultSink(args.output) as sink, stage('scrape'):
+                failed_links = scrape_results(all_comp_links, sink, archive, args.browsers, args.pages_per_browser)
+        finally:
+            if server is not None:
+                server.shutdown()
+    archive.close()
+    print(f"{sink.rows_written} rows written to {args.output}")
+    if failed_links:
+        print(f"Failed links: {failed_links}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        export_metrics('scrape_ifsc_bouldering')
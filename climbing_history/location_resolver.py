@@ -0,0 +1,164 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+import pandas as pd
+from tqdm import tqdm
+
+from .crawler import CrawlError, TIMEOUT, fetch_text
+from .parsing import parse_meta_location, parse_page_title
+
+# the sources tried for a route, in order, the first one that answers wins
+CRAG_MAP = 'crag_map' # the map marker of the route's crag page on climbing-history.org
+UKC_MAP = 'ukc_map' # the place:location meta tags of the crag's UKC page
+EIGHT_A_TITLE = '8a.nu_title' # the country in the title of the route's 8a.nu page (no coordinates)
+SOURCES = [CRAG_MAP, UKC_MAP, EIGHT_A_TITLE]
+
+# per domain: (max connections, max requests per second), each domain has its own connection pool
+DOMAIN_LIMITS = {
+    'ukclimbing.com': (4, 2.0),
+    '8a.nu': (2, 1.0),
+}
+DEFAULT_DOMAIN_LIMIT = (4, 2.0)
+DOMAIN_HEADERS = {
+    '8a.nu': {'User-Agent': 'Mozilla/5.0'}, # 8a.nu turns away the default user agent
+}
+
+
+def domain_of(url):
+    domain = urlsplit(url).netloc.lower()
+    return domain[4:] if domain.startswith('www.') else domain
+
+
+def country_from_8a_title(title):
+    """'Route, Country - Crag ...' -> 'Country', None if the title doesn't look like that"""
+    try:
+        return title.split(',')[1].split('-')[0].strip() or None
+    except (AttributeError, IndexError):
+        return None
+
+
+class DomainLimiter:
+    """Holds one of a domain's connection slots and spaces its requests at least 1/rate seconds apart.
+
+    Used in place of the semaphore crawler.fetch_text takes, so the cache and the retries still apply.
+    """
+
+    def __init__(self, concurrency, rate):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.interval = 1 / rate if rate else 0
+        self._next_slot = 0.0
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        now = time.monotonic()
+        wait = self._next_slot - now
+        self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def __aexit__(self, *exc_info):
+        self.semaphore.release()
+
+
+class LocationResolver:
+    """Find the location of routes by trying the SOURCES in order, all routes concurrently.
+
+    climb_titles is {link: (crag_link, external_link)} and crags {crag_link: crag} as returned by
+    find_climb_titles and resolve_crags. Every domain gets its own connection pool and limits
+    (DOMAIN_LIMITS), so no single site gets hammered however many routes are resolved.
+    """
+
+    def __init__(self, climb_titles, crags, domain_limits=None):
+        self.climb_titles = climb_titles
+        self.crags = crags
+        self.domain_limits = DOMAIN_LIMITS if domain_limits is None else domain_limits
+        self._sessions = {}
+        self._limiters = {}
+
+    def resolve(self, links):
+        """One row per link: link, crag_name, further_link, latitude, longitude, inferred_country,
+        title and location_source (the source that answered, None if none did)"""
+        records = asyncio.run(self._resolve_all(list(links)))
+        return pd.DataFrame(records, columns=['link', 'crag_name', 'further_link', 'latitude', 'longitude',
+                                              'inferred_country', 'title', 'location_source'])
+
+    async def _resolve_all(self, links):
+        try:
+            tasks = [asyncio.ensure_future(self._resolve(link)) for link in links]
+            for task in tqdm(asyncio.as_completed(tasks), total=len(tasks)):
+                await task
+            return [task.result() for task in tasks]
+        finally:
+            for session in self._sessions.values():
+                await session.close()
+            self._sessions = {}
+            self._limiters = {}
+
+    def _session(self, domain):
+        if domain not in self._sessions:
+            concurrency, rate = self.domain_limits.get(domain, DEFAULT_DOMAIN_LIMIT)
+            self._sessions[domain] = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=concurrency),
+                timeout=aiohttp.ClientTimeout(sock_connect=TIMEOUT, sock_read=TIMEOUT),
+                headers=DOMAIN_HEADERS.get(domain))
+            self._limiters[domain] = DomainLimiter(concurrency, rate)
+        return self._sessions[domain], self._limiters[domain]
+
+    async def _get(self, url):
+        """The text of a page, None if it couldn't be fetched"""
+        session, limiter = self._session(domain_of(url))
+        try:
+            status, text = await fetch_text(session, url, limiter)
+        except CrawlError as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+        if status != 200:
+            print(f"Error fetching {url}: status {status}")
+            return None
+        return text
+
+    async def _resolve(self, link):
+        record = {'link': link, 'crag_name': "", 'further_link': "", 'latitude': None, 'longitude': None,
+                  'inferred_country': None, 'title': None, 'location_source': None}
+        title = self.climb_titles.get(link)
+        if title is None:
+            return record  # the title couldn't be found on the first pass
+        crag_link, external_link = title
+        crag = self.crags.get(crag_link) if crag_link else None
+
+        if crag is not None:
+            record['crag_name'] = crag['crag_name']
+            if crag['latitude'] is not None:
+                record.update(latitude=crag['latitude'], longitude=crag['longitude'], location_source=CRAG_MAP)
+                return record
+
+            if crag['external_link']:
+                ukc_link = crag['external_link'] + "/#maps"
+                record['further_link'] = ukc_link
+                text = await self._get(ukc_link)
+                coords = parse_meta_location(text) if text is not None else None
+                if coords is not None:
+                    try:
+                        latitude, longitude = float(coords[0]), float(coords[1])
+                    except (TypeError, ValueError):
+                        pass
+                    else:
+                        record.update(latitude=latitude, longitude=longitude, location_source=UKC_MAP)
+                        return record
+
+        if not crag_link and external_link:
+            record['further_link'] = external_link
+            if '8a.nu' in domain_of(external_link):
+                text = await self._get(external_link)
+                page_title = parse_page_title(text) if text is not None else None
+                country = country_from_8a_title(page_title)
+                if country is not None:
+                    record.update(title=page_title, inferred_country=country, location_source=EIGHT_A_TITLE)
+        return record
+
+
+def resolve_locations(links, climb_titles, crags, domain_limits=None):
+    """Locations of the routes in links, see LocationResolver"""
+    return LocationResolver(climb_titles, crags, domain_limits).resolve(links)
@@ -0,0 +1,94 @@
+import os
+import numpy as np
+import plotly.express as px
+import plotly.io as pio
+pio.renderers.default = 'browser'
+
+from . import config
+from .datasets import read_dataset
+from .route_clusters import ZOOM_LEVELS, read_clusters
+
+# the figures are written as html files, opening them in the browser as well is optional so the
+# script can run without a display (e.g. from cron)
+PLOTS_DIR = os.path.join(config.PLOTS_DIR, 'routes_locations')
+SHOW_FIGURES = False
+
+
+def save_figure(fig, name):
+    os.makedirs(PLOTS_DIR, exist_ok=True)
+    fig.write_html(os.path.join(PLOTS_DIR, name))
+    if SHOW_FIGURES:
+        fig.show()
+
+
+def main():
+    ####################
+    # print some info
+    #####################
+    df = read_dataset('routes_location', columns=['climb_id', 'Route', 'Style', 'latitude', 'longitude', 'inferred_country'])
+    print(f"We have {len(df.climb_id.unique())} routes in our dataset ...")
+    print(f"For {len(df[~df.latitude.isna()].climb_id.unique())} we know the exact location ...")
+    print(f"For {len(df[~df.inferred_country.isna()].climb_id.unique())} we know the country (including those for which we have the coordinates) ...")
+    print(f"For {len(df.climb_id.unique())- len(df[~df.inferred_country.isna()].climb_id.unique())} we don't have final info on position (but maybe a link to a website)")
+
+    df = df[~df.climb_id.duplicated()]
+    df.loc[df.inferred_country ==  'United Kingdom of Great Britain and Northern Ireland', 'inferred_country'] = "United Kingdom"
+    country_count = (df[['inferred_country', 'Route']].groupby('inferred_country').count().
+                     reset_index().rename(columns = {'Route' : 'count'})).sort_values('count', ascending=False)
+    country_count['count_log'] = country_count['count'].map(np.log)
+
+    fig = px.bar(country_count,
+        x="inferred_country",y="count",
+        text="count", title="Number of routes per country",
+        labels={"inferred_country": "Country", "count": "Count"},
+        color="count", color_continuous_scale="Viridis_r")
+    save_figure(fig, "bar_chart_all_routes.html")
+
+    fig = px.choropleth(country_count,locations="inferred_country",
+        locationmode="country names",color="count_log",
+        color_continuous_scale="Viridis_r", title="Number of routes per country (log)")
+    save_figure(fig, "map_log_route_count.html")
+
+    #### maps for bouldering and lead
+    df[['style', 'work']] = df['Style'].str.split('|', expand=True)
+    df['style'] = df['style'].apply(lambda x: x.replace(" ", ""))
+
+    for style in ['Boulder', 'Lead']:
+        df_style = df[df['style'] == style]
+        style_count = (df_style[['inferred_country', 'Route']].groupby('inferred_country').count().
+                         reset_index().rename(columns={'Route': 'count'})).sort_values('count', ascending=False)
+        style_count['count_log'] = country_count['count'].map(np.log)
+
+        fig = px.bar(style_count,
+                     x="inferred_country", y="count",
+                     text="count", title=f"Number of routes per country, {style}",
+                     labels={"inferred_country": "Country", "count": "Count"},
+                     color="count", color_continuous_scale="Viridis_r")
+        save_figure(fig, f"bar_chart_{style}_routes.html")
+
+        fig = px.choropleth(style_count, locations="inferred_country",
+                            locationmode="country names", color="count_log",
+                            color_continuous_scale="Viridis_r", title=f"Number of routes per country, {style} (log)")
+        save_figure(fig, f"map_log_route_count_{style}.html")
+
+    ######
+    # plot map
+    #####
+
+    # the routes are drawn as the clusters precomputed by scrape_route_locations.py (see route_clusters.py),
+    # one map per zoom level, so the figure holds a few thousand points however many routes there are
+    for zoom in ZOOM_LEVELS:
+        clusters = read_clusters(zoom)
+        fig = px.scatter_geo(clusters,
+                            lat="latitude",
+                            lon="longitude",
+                            size="routes",
+                            hover_data={"routes": True, "boulder": True, "lead": True,
+                                        "latitude": False, "longitude": False},
+                            title=f"Routes (grid of {360 / 2 ** zoom:g} degree cells)")
+        fig.update_geos(showcountries=True, visible=False, countrycolor = 'black')
+        save_figure(fig, f"map_route_clusters_z{zoom}.html")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,28 @@
-
 import pandas as pd
 
-df = pd.read_csv("c://data//climbing//climbing_history_all_02_05.csv", parse_dates=['parsed_dates'])
+from .climbs import with_climb_ids
+from .config import data_path
+from .datasets import read_dataset, write_dataset
+
+# the dated ascents (parsed_dates) the locations are added to
+ASCENTS_PATH = data_path('climbing_history_all_02_05.csv')
+
+
+def main():
+    df = with_climb_ids(pd.read_csv(ASCENTS_PATH, parse_dates=['parsed_dates']))
+
+    df_with_loc = with_climb_ids(read_dataset('routes_location'))
+
+    cols_to_add = list(set(df_with_loc.columns) - set(df.columns))
 
-df_with_loc = pd.read_excel("c://data//climbing//dataset_with_routes_location.xlsx")
+    df_with_loc = df_with_loc[~df_with_loc.climb_id.duplicated()][cols_to_add + ["climb_id"]]
 
-cols_to_add = list(set(df_with_loc.columns) - set(df.columns))
+    df = df.merge(df_with_loc, on = "climb_id", how = 'left')
 
-df_with_loc = df_with_loc[~df_with_loc.Route.duplicated()][cols_to_add + ["Route"]]
+    # stored as a dataset instead of overwriting the csv it was read from, so running the merge
+    # again starts from the same input
+    write_dataset(df, 'ascents_with_locations')
 
-df = df.merge(df_with_loc, on = "Route", how = 'left')
 
-df.to_csv("c://data//climbing//climbing_history_all_02_05.csv", index = False)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
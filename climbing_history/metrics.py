@@ -0,0 +1,188 @@
+import contextlib
+import cProfile
+import json
+import math
+import os
+import threading
+import time
+
+from .config import METRICS_DIR
+
+# set to a directory (or the CLIMBING_PROFILE_DIR environment variable) to cProfile the profiled() blocks
+PROFILE_DIR = os.environ.get('CLIMBING_PROFILE_DIR')
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf) # seconds
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets) # per bucket, not cumulative
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q quantile"""
+        if not self.count:
+            return None
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= q * self.count:
+                return bound
+        return self.buckets[-1]
+
+
+class Metrics:
+    """Counters and latency histograms, by name and labels, plus gauges read from collectors at export time"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.collectors = []
+        self._lock = threading.Lock() # the IFSC browser pool updates from its worker threads
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        """Observe how long the block takes"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def register_collector(self, collect):
+        """collect() returns a list of (name, labels dict, value) gauges, called at every export"""
+        self.collectors.append(collect)
+
+    def gauges(self):
+        gauges = {}
+        for collect in self.collectors:
+            for name, labels, value in collect():
+                gauges[self._key(name, labels)] = value
+        return gauges
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def to_dict(self):
+        def labelled(key):
+            return {'name': key[0], 'labels': dict(key[1])}
+        return {
+            'counters': [dict(labelled(key), value=value) for key, value in sorted(self.counters.items())],
+            'histograms': [dict(labelled(key), count=h.count, sum=h.sum, mean=h.sum / h.count if h.count else None,
+                                p50=h.quantile(0.5), p95=h.quantile(0.95), p99=h.quantile(0.99),
+                                buckets={str(bound): count for bound, count in zip(h.buckets, h.counts)})
+                           for key, h in sorted(self.histograms.items())],
+            'gauges': [dict(labelled(key), value=value) for key, value in sorted(self.gauges().items())],
+        }
+
+    def to_prometheus(self, prefix='climbing_'):
+        """The metrics in the Prometheus text exposition format"""
+        def labels_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+        lines = []
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(self.counters.items()):
+            declare(f"{prefix}{name}_total", 'counter')
+            lines.append(f"{prefix}{name}_total{labels_text(labels)} {value}")
+        for (name, labels), h in sorted(self.histograms.items()):
+            declare(f"{prefix}{name}", 'histogram')
+            cumulative = 0
+            for bound, count in zip(h.buckets, h.counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                lines.append(f"{prefix}{name}_bucket{labels_text(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{prefix}{name}_sum{labels_text(labels)} {h.sum}")
+            lines.append(f"{prefix}{name}_count{labels_text(labels)} {h.count}")
+        for (name, labels), value in sorted(self.gauges().items()):
+            declare(f"{prefix}{name}", 'gauge')
+            lines.append(f"{prefix}{name}{labels_text(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# the metrics of this process, shared by all the modules
+METRICS = Metrics()
+inc = METRICS.inc
+observe = METRICS.observe
+timer = METRICS.timer
+register_collector = METRICS.register_collector
+
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+
+def export_metrics(job, metrics_dir=None, metrics=METRICS):
+    """Write the metrics of the run as <job>.json and <job>.prom in metrics_dir (METRICS_DIR by default)"""
+    metrics_dir = metrics_dir or METRICS_DIR
+    os.makedirs(metrics_dir, exist_ok=True)
+    data = dict(metrics.to_dict(), job=job, exported_at=time.time())
+    _write_atomic(os.path.join(metrics_dir, f"{job}.json"), json.dumps(data, indent=1))
+    _write_atomic(os.path.join(metrics_dir, f"{job}.prom"), metrics.to_prometheus())
+
+
+@contextlib.contextmanager
+def profiled(name, profile_dir=None):
+    """cProfile the block into <profile_dir>/<name>.prof when profiling is on (PROFILE_DIR), otherwise do nothing"""
+    profile_dir = profile_dir or PROFILE_DIR
+    if not profile_dir:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(profile_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(profile_dir, f"{name}.prof"))
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Time a pipeline stage into the stage_seconds histogram, and profile it when profiling is on"""
+    with timer('stage_seconds', stage=name), profiled(name):
+        yield
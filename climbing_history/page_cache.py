@@ -0,0 +1,149 @@
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+
+# index writes are committed in batches, every COMMIT_EVERY writes or COMMIT_SECONDS seconds
+# (a crash loses at most those, the pages are simply fetched again)
+COMMIT_EVERY = 100
+COMMIT_SECONDS = 5.0
+
+
+class PageCache:
+    """Content-addressed on-disk cache of fetched pages, keyed by URL.
+
+    Page bodies are stored zlib-compressed under the sha256 of their content, so identical
+    pages share one file. A small SQLite index maps each URL to its body and keeps the fetch
+    time (for the TTL) and the last access time (for the LRU eviction once the size cap is hit).
+
+    The size of the distinct bodies is summed once when the cache is opened and then kept up to
+    date as bodies are added and removed, so checking the cap doesn't scan the index. Call
+    flush() (or close()) when done to commit the last index writes.
+    """
+
+    def __init__(self, directory, ttl=None, max_bytes=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, 'blobs'), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(directory, 'index.sqlite'), check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS pages (
+            url TEXT PRIMARY KEY,
+            digest TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            fetched_at REAL NOT NULL,
+            accessed_at REAL NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS pages_digest ON pages (digest)")
+        self.db.commit()
+        self._pending = 0
+        self._committed_at = time.monotonic()
+        self._size = self._stored_size()
+        self.hits = 0
+        self.misses = 0
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, 'blobs', digest[:2], digest)
+
+    def get(self, url, ttl=None):
+        """Return (status, text) for a cached page, or None if it is missing or older than the ttl"""
+        ttl = self.ttl if ttl is None else ttl
+        row = self.db.execute("SELECT digest, status, fetched_at FROM pages WHERE url = ?", (url,)).fetchone()
+        now = time.time()
+        if row is None or (ttl is not None and now - row[2] > ttl):
+            self.misses += 1
+            return None
+        digest, status, _ = row
+        try:
+            with open(self._blob_path(digest), 'rb') as file:
+                text = zlib.decompress(file.read()).decode('utf-8')
+        except (OSError, zlib.error):
+            # the blob went missing or got corrupted, forget about it and fetch again
+            self.delete(url)
+            self.misses += 1
+            return None
+        self.db.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (now, url))
+        self._wrote()
+        self.hits += 1
+        return status, text
+
+    def put(self, url, status, text):
+        """Store a fetched page and evict the least recently used pages if over the size cap"""
+        body = zlib.compress(text.encode('utf-8'))
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as file:
+                file.write(body)
+            os.replace(tmp_path, path)
+        now = time.time()
+        old = self.db.execute("SELECT digest, size FROM pages WHERE url = ?", (url,)).fetchone()
+        if not (old and old[0] == digest) and not self._digest_used(digest):
+            self._size += len(body)
+        self.db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                        (url, digest, status, len(body), now, now))
+        self._wrote()
+        if old and old[0] != digest:
+            self._drop_blob_if_unused(*old)
+        if self.max_bytes is not None and self._size > self.max_bytes:
+            self.evict(self.max_bytes)
+
+    def delete(self, url):
+        row = self.db.execute("SELECT digest, size FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return
+        self.db.execute("DELETE FROM pages WHERE url = ?", (url,))
+        self._wrote()
+        self._drop_blob_if_unused(*row)
+
+    def _digest_used(self, digest):
+        return self.db.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone() is not None
+
+    def _drop_blob_if_unused(self, digest, size):
+        if not self._digest_used(digest):
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+    def _wrote(self):
+        """Count an index write, committing once enough of them piled up"""
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY or time.monotonic() - self._committed_at >= COMMIT_SECONDS:
+            self.flush()
+
+    def flush(self):
+        """Commit the pending index writes"""
+        self.db.commit()
+        self._pending = 0
+        self._committed_at = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def _stored_size(self):
+        return self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM pages)").fetchone()[0]
+
+    def size(self):
+        """Bytes on disk taken by the distinct page bodies"""
+        return self._size
+
+    def evict(self, max_bytes):
+        """Drop least recently used pages until the cache fits in max_bytes"""
+        if self._size <= max_bytes:
+            return
+        for url, in self.db.execute("SELECT url FROM pages ORDER BY accessed_at").fetchall():
+            self.delete(url)
+            if self._size <= max_bytes:
+                break
+        self.flush()
+
+    def urls(self):
+        return [row[0] for row in self.db.execute("SELECT url FROM pages")]
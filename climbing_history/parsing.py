@@ -0,0 +1,380 @@
+import argparse
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+import lxml.html
+
+# html extraction backend: 'lxml' (C parser, fast) or 'bs4' (BeautifulSoup with html.parser)
+# both return the same records, run this file with --compare to check it on the cached pages
+BACKEND = 'lxml'
+BACKENDS = ('lxml', 'bs4')
+
+# only the parts of the pages we need are handed to BeautifulSoup
+TABLE_ONLY = SoupStrainer('table')
+TITLE_AND_LINKS = SoupStrainer(['span', 'a'])
+CRAG_PARTS = SoupStrainer(['title', 'script', 'a'])
+META_ONLY = SoupStrainer('meta')
+TITLE_ONLY = SoupStrainer('title')
+
+EXTERNAL_LINK_CLASS = 'text-break text-muted small'
+MARKER_PATTERN = re.compile(r"L\.marker\(\[(\-?\d+\.\d+),\s*(\-?\d+\.\d+)\]\)")
+
+
+def parse_listing_page(html, backend=None):
+    """Extract the climb links and grades from a /climbs?page=N listing page.
+
+    Returns None when the page has no table, otherwise a list of (link, grade, row_text) tuples,
+    row_text being the whole listing row (used to notice climbs that changed since the last crawl).
+    """
+    return _extractor('listing', backend)(html)
+
+
+def parse_climb_page(html, link, backend=None):
+    """Extract the ascent rows from a /climb/<id>/<slug> page.
+
+    Returns None when no ascents are logged, otherwise a list of rows (the table cells plus the link).
+    """
+    return _extractor('ascents', backend)(html, link)
+
+
+def parse_climb_title(html, link, backend=None):
+    """Find the title of a climb page and the links next to it.
+
+    Returns None when the title can't be found, otherwise (crag_link, external_link): the absolute
+    url of the crag linked in the title and the external link (e.g. 8a.nu) shown on the page,
+    each None when missing.
+    """
+    return _extractor('title', backend)(html, link)
+
+
+def parse_crag_page(html, backend=None):
+    """Extract the name, the map marker and the external link (e.g. UKC) of a crag page"""
+    return _extractor('crag', backend)(html)
+
+
+def parse_meta_location(html, backend=None):
+    """Read the place:location meta tags of a UKC-style page, returns (latitude, longitude) or None"""
+    return _extractor('meta_location', backend)(html)
+
+
+def parse_page_title(html, backend=None):
+    """Text of the <title> of a page (e.g. 8a.nu, where it holds the crag and country), or None"""
+    return _extractor('page_title', backend)(html)
+
+
+def _extractor(name, backend):
+    backend = backend or BACKEND
+    if backend not in EXTRACTORS:
+        raise ValueError(f"Unknown extraction backend {backend!r}, pick one of {BACKENDS}")
+    return EXTRACTORS[backend][name]
+
+
+def _title_pattern(link):
+    target_name = link.split('/')[-1].split('-')[0].capitalize()
+    return re.sub(r"([a-zA-Z])(['’]?)", r"\1['’]?", target_name)
+
+
+def _crag(crag_name, map_script, external_link):
+    crag = {'crag_name': crag_name,
+            'latitude': None,
+            'longitude': None,
+            'external_link': external_link or None}
+    if map_script:
+        marker_pattern = MARKER_PATTERN.search(map_script)
+        if marker_pattern:
+            crag['latitude'] = float(marker_pattern.group(1))
+            crag['longitude'] = float(marker_pattern.group(2))
+    return crag
+
+
+####################
+# BeautifulSoup backend
+####################
+
+def _bs4_listing(html):
+    soup = BeautifulSoup(html, 'html.parser', parse_only=TABLE_ONLY)
+
+    # Find the table
+    table = soup.find('table')
+    if not table:
+        return None
+
+    # Extract links from the first column
+    climbs = []
+    rows = table.find_all('tr')
+    for row in rows[1:]:  # Skip the header row
+        first_cell = row.find('td')
+        if first_cell and first_cell.find('a'): #check if there's a link
+            row_text = row.get_text().lower()
+            link = first_cell.find('a')['href']
+            grade = row_text.split("\n")[3]
+            climbs.append((link, grade, row_text))
+    return climbs
+
+
+def _bs4_ascents(html, link):
+    soup = BeautifulSoup(html, 'html.parser', parse_only=TABLE_ONLY)
+
+    # Find the table containing climber data
+    table = soup.find('table')  # Assuming data is in a <table> tag
+    if not table:
+        return None
+
+    # Parse data, excluding rows with "Reference"
+    data = []
+    for row in table.find_all('tr')[1:]:  # Skip the header row
+        cells = [td.text.strip() for td in row.find_all('td')]
+        if not any("Reference" in cell for cell in cells):  # Exclude rows with "Reference"
+            cells.append(link)
+            data.append(cells)
+    return data
+
+
+def _bs4_title(html, link):
+    pattern = _title_pattern(link)
+    soup = BeautifulSoup(html, 'html.parser', parse_only=TITLE_AND_LINKS)
+
+    # Try to get the link to the crag
+    spans = [span for span in soup.find_all("span") if re.match(f"^{pattern}", span.get_text(strip=True), re.IGNORECASE)]
+    if not spans:
+        return None
+    crag_link = spans[0].find("a")
+    if crag_link:
+        crag_link = "https://climbing-history.org" + crag_link["href"]
+    external_link = soup.find("a", {'class': EXTERNAL_LINK_CLASS})
+    if external_link:
+        external_link = external_link.get('href')
+    return crag_link or None, external_link or None
+
+
+def _bs4_crag(html):
+    soup = BeautifulSoup(html, 'html.parser', parse_only=CRAG_PARTS)
+    title = soup.find("title")
+    map_scripts = [script.string for script in soup.find_all("script") if script.string and "L.map" in script.string]
+    external_link = soup.find("a", {'class': EXTERNAL_LINK_CLASS})
+    return _crag(title.get_text(strip=True) if title else "",
+                 map_scripts[0] if map_scripts else None,
+                 external_link.get('href') if external_link else None)
+
+
+def _bs4_meta_location(html):
+    soup = BeautifulSoup(html, 'html.parser', parse_only=META_ONLY)
+    latitude = soup.find("meta", {'property': 'place:location:latitude'})
+    longitude = soup.find("meta", {'property': 'place:location:longitude'})
+    if latitude is None or longitude is None:
+        return None
+    return latitude.get('content'), longitude.get('content')
+
+
+def _bs4_page_title(html):
+    title = BeautifulSoup(html, 'html.parser', parse_only=TITLE_ONLY).find("title")
+    return title.get_text() if title else None
+
+
+####################
+# lxml backend
+####################
+
+# BeautifulSoup leaves these out of get_text() and collapses whitespace-only strings,
+# _lxml_text does the same so both backends give the same text (ifsc_parsing.py uses it too)
+NON_TEXT_TAGS = {'script', 'style', 'template'}
+ASCII_SPACES = ' \n\t\x0c\r'
+
+
+def _lxml_tree(html):
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # pages with an xml encoding declaration have to be handed over as bytes
+        return lxml.html.document_fromstring(html.encode('utf-8'))
+
+
+def _lxml_strings(element):
+    if element.text:
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in NON_TEXT_TAGS:
+            yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _lxml_text(element, strip=False):
+    """Text of an element the way BeautifulSoup's get_text() returns it"""
+    strings = []
+    for string in _lxml_strings(element):
+        if not string.strip(ASCII_SPACES):
+            string = "\n" if "\n" in string else " "
+        if strip:
+            string = string.strip()
+            if not string:
+                continue
+        strings.append(string)
+    return "".join(strings)
+
+
+def _lxml_first_table(html):
+    tree = _lxml_tree(html)
+    return tree.find('.//table') if tree is not None else None
+
+
+def _lxml_listing(html):
+    table = _lxml_first_table(html)
+    if table is None:
+        return None
+
+    climbs = []
+    for row in table.findall('.//tr')[1:]:  # Skip the header row
+        first_cell = row.find('.//td')
+        anchor = first_cell.find('.//a') if first_cell is not None else None
+        if anchor is not None:
+            row_text = _lxml_text(row).lower()
+            grade = row_text.split("\n")[3]
+            climbs.append((anchor.attrib['href'], grade, row_text))
+    return climbs
+
+
+def _lxml_ascents(html, link):
+    table = _lxml_first_table(html)
+    if table is None:
+        return None
+
+    data = []
+    for row in table.findall('.//tr')[1:]:  # Skip the header row
+        cells = [_lxml_text(td).strip() for td in row.iterfind('.//td')]
+        if not any("Reference" in cell for cell in cells):  # Exclude rows with "Reference"
+            cells.append(link)
+            data.append(cells)
+    return data
+
+
+def _lxml_external_link(tree):
+    links = tree.xpath('//a[@class=$css]', css=EXTERNAL_LINK_CLASS)
+    return links[0].get('href') if links else None
+
+
+def _lxml_title(html, link):
+    pattern = _title_pattern(link)
+    tree = _lxml_tree(html)
+    if tree is None:
+        return None
+
+    spans = [span for span in tree.iter('span') if re.match(f"^{pattern}", _lxml_text(span, strip=True), re.IGNORECASE)]
+    if not spans:
+        return None
+    crag_link = spans[0].find('.//a')
+    if crag_link is not None:
+        crag_link = "https://climbing-history.org" + crag_link.attrib['href']
+    return crag_link or None, _lxml_external_link(tree)
+
+
+def _lxml_crag(html):
+    tree = _lxml_tree(html)
+    if tree is None:
+        return _crag("", None, None)
+    title = tree.find('.//title')
+    # BeautifulSoup only sets script.string for scripts with a single text child
+    map_scripts = [script.text for script in tree.iter('script')
+                   if script.text and len(script) == 0 and "L.map" in script.text]
+    return _crag(_lxml_text(title, strip=True) if title is not None else "",
+                 map_scripts[0] if map_scripts else None,
+                 _lxml_external_link(tree))
+
+
+def _lxml_meta_location(html):
+    tree = _lxml_tree(html)
+    if tree is None:
+        return None
+    latitude = tree.xpath('//meta[@property="place:location:latitude"]')
+    longitude = tree.xpath('//meta[@property="place:location:longitude"]')
+    if not latitude or not longitude:
+        return None
+    return latitude[0].get('content'), longitude[0].get('content')
+
+
+def _lxml_page_title(html):
+    tree = _lxml_tree(html)
+    title = tree.find('.//title') if tree is not None else None
+    return _lxml_text(title) if title is not None else None
+
+
+EXTRACTORS = {
+    'bs4': {'listing': _bs4_listing,
+            'ascents': _bs4_ascents,
+            'title': _bs4_title,
+            'crag': _bs4_crag,
+            'meta_location': _bs4_meta_location,
+            'page_title': _bs4_page_title},
+    'lxml': {'listing': _lxml_listing,
+             'ascents': _lxml_ascents,
+             'title': _lxml_title,
+             'crag': _lxml_crag,
+             'meta_location': _lxml_meta_location,
+             'page_title': _lxml_page_title},
+}
+
+
+####################
+# comparison mode
+####################
+
+def extractors_for_url(url):
+    """The extractors that apply to a page, as {name: function(html, backend)}"""
+    if "climbing-history.org/climbs?page=" in url:
+        return {'listing': parse_listing_page}
+    if "climbing-history.org/climb/" in url:
+        link = url.split("climbing-history.org", 1)[1]
+        return {'ascents': lambda html, backend: parse_climb_page(html, link, backend),
+                'title': lambda html, backend: parse_climb_title(html, link, backend)}
+    if "climbing-history.org" in url:
+        return {'crag': parse_crag_page}
+    return {'meta_location': parse_meta_location, 'page_title': parse_page_title}
+
+
+def compare_backends(pages, backends=BACKENDS):
+    """Run every backend over the pages, a list of (url, html), and return the differences.
+
+    Each difference is (url, extractor, {backend: result}). An extractor raising counts as a result.
+    """
+    differences = []
+    for url, html in pages:
+        for name, extract in extractors_for_url(url).items():
+            results = {}
+            for backend in backends:
+                try:
+                    results[backend] = extract(html, backend)
+                except Exception as e:
+                    results[backend] = f"{type(e).__name__}: {e}"
+            if any(result != results[backends[0]] for result in results.values()):
+                differences.append((url, name, results))
+    return differences
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Diff the records extracted by the html backends")
+    arg_parser.add_argument('--compare', action='store_true', help="compare the backends over the cached pages")
+    arg_parser.add_argument('--cache-dir', default=None, help="page cache to read the pages from")
+    arg_parser.add_argument('--limit', type=int, default=None, help="only compare this many pages")
+    args = arg_parser.parse_args(argv)
+    if not args.compare:
+        arg_parser.print_help()
+        return
+
+    from .crawler import CACHE_DIR
+    from .page_cache import PageCache
+    cache = PageCache(args.cache_dir or CACHE_DIR)
+    urls = cache.urls()[:args.limit]
+    pages = ((url, page[1]) for url, page in ((url, cache.get(url, ttl=float('inf'))) for url in urls) if page)
+    differences = compare_backends(pages)
+    cache.close()
+    for url, name, results in differences:
+        print(f"{name} differs for {url}")
+        for backend, result in results.items():
+            print(f"  {backend}: {result!r}")
+    print(f"{len(differences)} differences over {len(urls)} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.strtree import STRtree
+
+from .config import GEO_DIR
+from .datasets import dataset_exists, read_dataset, write_dataset
+
+# Natural Earth admin 0 countries, the ADMIN column holds the country name
+COUNTRIES_PATH = os.path.join(GEO_DIR, 'admin_0', 'ne_110m_admin_0_countries.shp')
+NAME_COLUMN = 'ADMIN'
+# every coordinate looked up so far and its country, so each is only tested against the polygons once
+COUNTRY_CACHE_DATASET = 'coordinate_countries'
+COORDINATE_DECIMALS = 6 # coordinates are cached rounded to this many decimals (about 10cm)
+
+
+class ReverseGeocoder:
+    """Country of a coordinate, from an STRtree spatial index over the country polygons.
+
+    Only the polygons whose bounding box holds a point are tested against it, and whole arrays
+    of points are looked up in one call.
+    """
+
+    def __init__(self, names, geometries):
+        self.names = np.asarray(names, dtype=object)
+        self.tree = STRtree(np.asarray(geometries, dtype=object))
+
+    @classmethod
+    def from_shapefile(cls, path=COUNTRIES_PATH, name_column=NAME_COLUMN):
+        import geopandas
+        world = geopandas.read_file(path)
+        return cls(world[name_column].tolist(), world.geometry.values)
+
+    def lookup(self, latitudes, longitudes):
+        """Country names of the coordinates, None for points outside every country (or without coordinates)"""
+        latitudes = np.asarray(latitudes, dtype=float)
+        longitudes = np.asarray(longitudes, dtype=float)
+        countries = np.full(len(latitudes), None, dtype=object)
+        valid = ~(np.isnan(latitudes) | np.isnan(longitudes))
+        points = shapely.points(longitudes[valid], latitudes[valid])
+        point_index, polygon_index = self.tree.query(points, predicate='intersects')
+        # a point on a border touches two countries, keep the first one
+        first = np.unique(point_index, return_index=True)[1]
+        countries[np.flatnonzero(valid)[point_index[first]]] = self.names[polygon_index[first]]
+        return countries
+
+
+@functools.lru_cache(maxsize=None)
+def get_reverse_geocoder(path=COUNTRIES_PATH):
+    """The geocoder over the countries in path, read and indexed once per process"""
+    return ReverseGeocoder.from_shapefile(path)
+
+
+def countries_for(latitudes, longitudes, geocoder=None, cache_dataset=COUNTRY_CACHE_DATASET):
+    """Country names of the coordinates, through the persisted coordinate -> country cache.
+
+    Only coordinates that aren't in the cache yet are looked up (with geocoder, the Natural Earth
+    countries by default), and added to the cache. Set cache_dataset to None to skip the cache.
+    """
+    coords = pd.DataFrame({'latitude': np.asarray(latitudes, dtype=float),
+                           'longitude': np.asarray(longitudes, dtype=float)}).round(COORDINATE_DECIMALS)
+    distinct = coords.dropna().drop_duplicates()
+
+    if cache_dataset is not None and dataset_exists(cache_dataset):
+        cache = read_dataset(cache_dataset)
+    else:
+        cache = pd.DataFrame({'latitude': [], 'longitude': [], 'country': []})
+    new = distinct.merge(cache[['latitude', 'longitude']], on=['latitude', 'longitude'], how='left', indicator=True)
+    new = new[new['_merge'] == 'left_only'].drop(columns='_merge')
+
+    if not new.empty:
+        geocoder = geocoder or get_reverse_geocoder()
+        new['country'] = geocoder.lookup(new['latitude'], new['longitude'])
+        cache = pd.concat([cache, new], ignore_index=True)
+        if cache_dataset is not None:
+            write_dataset(cache, cache_dataset)
+
+    found = coords.merge(cache, on=['latitude', 'longitude'], how='left')
+    return found['country'].where(found['country'].notna(), None).to_numpy(dtype=object)
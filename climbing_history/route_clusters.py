@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from .datasets import dataset_exists, read_dataset, write_dataset
+
+# the routes are counted on a square lat/lon grid per zoom level, a cell is 360 / 2**zoom degrees wide
+ZOOM_LEVELS = [2, 4, 6, 8]
+STYLES = ['Boulder', 'Lead']
+CLUSTERS_DATASET = 'route_clusters'
+
+
+def route_points(df):
+    """One row per located route with its latitude, longitude and style (Boulder, Lead, ...)"""
+    df = df[~df.climb_id.duplicated() & df.latitude.notna() & df.longitude.notna()]
+    return pd.DataFrame({
+        'latitude': df['latitude'].astype(float).values,
+        'longitude': df['longitude'].astype(float).values,
+        'style': df['Style'].str.split('|').str[0].str.replace(" ", "").values,
+    })
+
+
+def build_clusters(points, zoom_levels=ZOOM_LEVELS):
+    """Grid clusters of the route points at every zoom level.
+
+    One row per non-empty cell: zoom, cell_x, cell_y, the mean latitude and longitude of its
+    routes (where the cluster is drawn), the number of routes and the number per style.
+    """
+    clusters = []
+    for zoom in zoom_levels:
+        cell_size = 360 / 2 ** zoom
+        cells = points.assign(
+            zoom=zoom,
+            cell_x=np.floor((points['longitude'] + 180) / cell_size).astype('int32'),
+            cell_y=np.floor((points['latitude'] + 90) / cell_size).astype('int32'))
+        grouped = cells.groupby(['zoom', 'cell_x', 'cell_y'])
+        cluster = grouped.agg(latitude=('latitude', 'mean'), longitude=('longitude', 'mean'),
+                              routes=('style', 'size'))
+        per_style = cells.groupby(['zoom', 'cell_x', 'cell_y', 'style']).size().unstack('style', fill_value=0)
+        for style in STYLES:
+            cluster[style.lower()] = per_style[style] if style in per_style else 0
+        clusters.append(cluster.reset_index())
+    result = pd.concat(clusters, ignore_index=True)
+    for style in STYLES:
+        result[style.lower()] = result[style.lower()].fillna(0).astype('int32')
+    result['routes'] = result['routes'].astype('int32')
+    result['zoom'] = result['zoom'].astype('int8')
+    return result
+
+
+def write_clusters(zoom_levels=ZOOM_LEVELS):
+    """Build the clusters of the 'routes_location' dataset and store them as the 'route_clusters' dataset"""
+    df = read_dataset('routes_location', columns=['climb_id', 'Style', 'latitude', 'longitude'])
+    clusters = build_clusters(route_points(df), zoom_levels)
+    write_dataset(clusters, CLUSTERS_DATASET)
+    return clusters
+
+
+def read_clusters(zoom=None):
+    """The precomputed clusters (of one zoom level), built first if they don't exist yet"""
+    if not dataset_exists(CLUSTERS_DATASET):
+        write_clusters()
+    filters = None if zoom is None else [('zoom', '=', zoom)]
+    return read_dataset(CLUSTERS_DATASET, filters=filters)
+
+
+if __name__ == "__main__":
+    clusters = write_clusters()
+    print(clusters.groupby('zoom')['routes'].agg(['size', 'sum']).rename(columns={'size': 'clusters', 'sum': 'routes'}))
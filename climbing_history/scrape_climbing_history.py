@@ -1,157 +1,239 @@
-
+import os
 import requests
-from bs4 import BeautifulSoup
 from tqdm import tqdm
 import pandas as pd
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
 import numpy as np
-import dateparser
-import re
-from dateutil import parser
-
-### first find all the links for the individual pages of each climb
-# Base URL for the paginated pages
-base_url = "https://climbing-history.org/climbs?page="
-
-# Configure retries
-retries = Retry(total=5, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-session = requests.Session()
-session.mount('https://', HTTPAdapter(max_retries=retries))
 
-# List to store all climb links
-all_climb_links = []
-all_grades = []
-
-# Loop through pages 1 to 200 (after page 200 the climbs have zero ascents)
-skipped_pages = []
-skipped_urls = []
-for page in tqdm(range(1, 230)):  # Adjust range as needed
-    # Construct the URL for the current page
-    url = base_url + str(page)
-
-    try:
-        response = session.get(url, timeout=10)
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching {url}: {e}")
-        skipped_urls.append(url)
-        continue  # Skip to the next URL
+from .config import GRADES_PATH, LINKS_PATH, data_path
+from .crawler import fetch, crawl
+from .parsing import parse_listing_page, parse_climb_page
+from .crawl_state import CrawlState, DONE, NO_ASCENTS
+from .dates import normalise_dates
+from .grades import encode_grades, strip_approx
+from .climbs import build_climb_table, climb_ids, route_names
+from .climber_index import ClimberIndex
+from .metrics import export_metrics, stage
+from .datasets import write_dataset
+
+# 'async' fetches pages concurrently, 'blocking' walks them one at a time
+# both go through the shared page cache (see crawler.py)
+CRAWL_MODE = 'async'
+CONCURRENCY = 20 # max number of requests in flight in async mode
+WORKERS = os.cpu_count() # processes parsing the climb pages in async mode (0 parses in the crawler's loop)
+
+# every scraped climb is checkpointed here, so a crashed crawl resumes where it stopped
+CRAWL_STATE_PATH = data_path('crawl_state.sqlite')
+# only scrape the climbs that are new or changed since the last crawl (instead of a full refresh)
+INCREMENTAL = False
+# the ascents are stored as the 'ascents' parquet dataset, the excel copy is optional
+EXPORT_EXCEL = False
 
-    if response.status_code != 200:
-        print(f"Failed to load page {page}")
-        skipped_pages.append(page)
-        continue  # Skip to the next page on error
-
-    # Parse the HTML content
-    soup = BeautifulSoup(response.text, 'html.parser')
-
-    # Find the table
-    table = soup.find('table')
-    if not table:
-        print(f"No table found on page {page}")
-        skipped_pages.append(page)
-        continue  # Skip if no table is found
-
-    # Extract links from the first column
-    rows = table.find_all('tr')
-    for row in rows[1:]:  # Skip the header row
-        first_cell = row.find('td')
-        if first_cell and first_cell.find('a'): #check if there's a link
-            row_text = row.get_text().lower()
-            link = first_cell.find('a')['href']
-            grade = row_text.split("\n")[3]
-            all_climb_links.append(link)
-            all_grades.append(grade)
-
-# Print the total number of links found
-print(f"Total links found: {len(all_climb_links)}")
-
-# Save all links and grades files
-with open('../all_climb_links.txt', 'w', encoding='utf-8') as file:
-    file.write("\n".join(all_climb_links))
-with open('../all_grades.txt', 'w', encoding='utf-8') as file:
-    file.write("\n".join(all_grades))
-
-## now scrape info from all of the individual pages
+# Base URL for the paginated pages
+listing_url = "https://climbing-history.org/climbs?page="
 #base url for the website
 base_url = "https://climbing-history.org"
 
-with open('../all_climb_links.txt', 'r', encoding='utf-8') as file:
-    all_climb_links = file.read().splitlines()
-with open('../all_grades.txt', 'r', encoding='utf-8') as file:
-    all_grades = file.read().splitlines()
-dict_grades = dict(zip(all_climb_links, all_grades))
-
-#now parse all the links to extract the data tables
-skipped_urls = []
-data = [] # place to concat all the data scraped
 
-# Configure retries
-retries = Retry(total=5, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-session = requests.Session()
-session.mount('https://', HTTPAdapter(max_retries=retries))
-
-for link in tqdm(all_climb_links):
-    url = base_url + link #the climb page's url
-
-    try:
-        response = session.get(url, timeout=10)
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching {url}: {e}")
-        skipped_urls.append(url)
-        continue  # Skip to the next URL
-
-    # Parse the page with BeautifulSoup
-    soup = BeautifulSoup(response.text, 'html.parser')
+def parse_listing_response(url, status_code, text):
+    page = int(url.split("=")[-1])
+    if status_code != 200:
+        print(f"Failed to load page {page}")
+        return None
+    climbs = parse_listing_page(text)
+    if climbs is None:
+        print(f"No table found on page {page}")
+    return climbs
 
-    # Find the table containing climber data
-    table = soup.find('table')  # Assuming data is in a <table> tag
 
-    # Extract table rows
-    try:
-        rows = table.find_all('tr')
-    except:
+def parse_climb_response(url, status_code, text):
+    """(status_code, ascent rows) of a climb page, rows None if no ascents are logged (runs in the parser processes)"""
+    if status_code != 200:
+        # throttled, missing or forbidden, not a climb without ascents
+        print(f"Failed to load {url}: status {status_code}")
+        return status_code, None
+    rows = parse_climb_page(text, url[len(base_url):])
+    if rows is None:
         print(f"No ascents logged for {url}")
-        continue
-
-    # Parse headers
-    header = [th.text.strip() for th in rows[0].find_all('th')]
-
-    # Parse data, excluding rows with "Reference"
-    for row in rows[1:]:  # Skip the header row
-        cells = [td.text.strip() for td in row.find_all('td')]
-        if not any("Reference" in cell for cell in cells):  # Exclude rows with "Reference"
-            cells.append(link)
-            data.append(cells)
-
-header = ['ph', 'climber', 'style', 'ascent_date', 'suggested_grade', 'link']
-# Create a DataFrame
-df = pd.DataFrame(data, columns=header)
-df = df[['climber', 'style', 'ascent_date', 'suggested_grade', 'link']]
-df = df.replace({None: np.nan})
-df.dropna(inplace = True)
-
-df['route'] = df['link'].apply(lambda x: x.split("/")[-1])  # add climb name column by taking it from the link
-df['official_grade'] = df.link.map(dict_grades)
-df['official_grade'] = df['official_grade'].apply(lambda x: x.replace(" (approx)", ""))
-df.route = df.route.apply(lambda x: " ".join(word.capitalize() for word in x.split("-")))
-
-###
-df[['style', 'work']] = df['style'].str.split('|', expand=True)
-df['style'] = df['style'].apply(lambda x: x.strip())
-
-# Function to parse mixed date formats
-def parse_date(entry):
-    clean_str = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', entry)
+    return status_code, rows
+
+
+def fetch_all(urls, parse, write=None, workers=0, ttl=None):
+    """Fetch and parse the urls with the configured crawl mode, returns (results, skipped_urls)"""
+    if CRAWL_MODE == 'async':
+        return crawl(urls, parse, write=write, concurrency=CONCURRENCY, workers=workers, ttl=ttl)
+
+    results = []
+    skipped_urls = []
+    for url in tqdm(urls):
+        try:
+            status_code, text = fetch(url, ttl=ttl)
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            skipped_urls.append(url)
+            results.append(None)
+            continue  # Skip to the next URL
+        result = parse(url, status_code, text)
+        if write is not None:
+            write(url, result)
+        results.append(result)
+    return results, skipped_urls
+
+
+def scrape_listing(state):
+    """Find all the links for the individual pages of each climb, and save the links and grades files.
+
+    Returns the links that are new since the previous links file or whose listing row changed.
+    """
+    # Loop through pages 1 to 200 (after page 200 the climbs have zero ascents)
+    listing_urls = [listing_url + str(page) for page in range(1, 230)]  # Adjust range as needed
+    # always downloaded again: the listing defines what the refresh scrapes, a cached one would miss the new climbs
+    listings, skipped_urls = fetch_all(listing_urls, parse_listing_response, ttl=0)
+    skipped_pages = [int(url.split("=")[-1]) for url, climbs in zip(listing_urls, listings)
+                     if climbs is None and url not in skipped_urls]
+
+    listing_rows = [climb for climbs in listings for climb in climbs or []]
+    all_climb_links = [link for link, _, _ in listing_rows]
+    all_grades = [grade for _, grade, _ in listing_rows]
+
+    # Print the total number of links found
+    print(f"Total links found: {len(all_climb_links)}")
+    if skipped_pages or skipped_urls:
+        print(f"Skipped pages: {skipped_pages}, skipped urls: {skipped_urls}")
+
+    # compare the fresh listing with the previous one
     try:
-        return parser.parse(clean_str, dayfirst=True)
-    except Exception:
-        return pd.NaT
-
-# Apply the function to the 'dates' column
-df['parsed_date'] = df['ascent_date'].apply(parse_date)
-
-df.to_excel("c://data//climbing//climbing_history_all_23_02_2026.xlsx", index = False)
-
-
-
+        with open(LINKS_PATH, 'r', encoding='utf-8') as file:
+            previous_links = set(file.read().splitlines())
+    except FileNotFoundError:
+        previous_links = set()
+    new_links, changed_links = state.update_listing(listing_rows)
+    new_links = set(new_links)
+    new_links = [link for link in all_climb_links if link in new_links or link not in previous_links]
+    print(f"New climbs since the last crawl: {len(new_links)}, changed climbs: {len(changed_links)}")
+    updated = set(new_links).union(changed_links)
+    updated_links = [link for link in all_climb_links if link in updated]
+
+    # Save all links and grades files
+    with open(LINKS_PATH, 'w', encoding='utf-8') as file:
+        file.write("\n".join(all_climb_links))
+    with open(GRADES_PATH, 'w', encoding='utf-8') as file:
+        file.write("\n".join(all_grades))
+    return updated_links
+
+
+def scrape_climbs(state, all_climb_links, updated_links=None):
+    """Scrape the ascents of the climbs that still need it, checkpointing each one in the crawl state.
+
+    In INCREMENTAL mode these are updated_links, the listing's diff from scrape_listing, plus the
+    climbs a previous run didn't finish or failed on. Without updated_links (the ascents are
+    scraped separately from the listing) the crawl state's pending climbs stand in for the diff.
+    """
+    if INCREMENTAL:
+        # new and changed climbs, plus whatever an interrupted run left behind
+        to_scrape = set(state.to_scrape(all_climb_links)).union(updated_links or ())
+        links_to_scrape = [link for link in all_climb_links if link in to_scrape]
+        page_ttl = 0 # changed climbs must be downloaded again, not read from the page cache
+    elif state.start_full_refresh():
+        links_to_scrape = all_climb_links
+        page_ttl = None
+    else:
+        print("Resuming the interrupted full refresh")
+        links_to_scrape = state.to_scrape(all_climb_links)
+        page_ttl = None
+    print(f"Climbs to scrape: {len(links_to_scrape)} of {len(all_climb_links)}")
+
+    # the writer stage: persist each climb's rows as soon as they are parsed
+    def record_climb(url, result):
+        link = url[len(base_url):]
+        status_code, rows = result
+        if status_code != 200:
+            state.record_failure(link) # retried by the next run
+        elif rows is None:
+            state.record(link, [], status=NO_ASCENTS)
+        else:
+            state.record(link, rows, status=DONE)
+
+    climb_urls = [base_url + link for link in links_to_scrape] #the climb pages' urls
+    _, skipped_urls = fetch_all(climb_urls, parse_climb_response, write=record_climb, workers=WORKERS, ttl=page_ttl)
+
+    for url in skipped_urls:
+        state.record_failure(url[len(base_url):])
+    if not INCREMENTAL:
+        state.finish_full_refresh() # failed climbs are retried by the next run
+    print(f"Crawl state: {state.counts()}")
+
+
+def build_ascents_table(data, dict_grades):
+    header = ['ph', 'climber', 'style', 'ascent_date', 'suggested_grade', 'link']
+    # Create a DataFrame
+    df = pd.DataFrame(data, columns=header)
+    df = df[['climber', 'style', 'ascent_date', 'suggested_grade', 'link']]
+    df = df.replace({None: np.nan})
+    df.dropna(inplace = True)
+
+    df['climb_id'] = climb_ids(df['link']) # the join key of all the climb datasets
+    df['route'] = route_names(df['link'])  # add climb name column by taking it from the link
+    df['official_grade'] = df.link.map(dict_grades)
+
+    ###
+    df[['style', 'work']] = df['style'].str.split('|', expand=True)
+    df['style'] = df['style'].apply(lambda x: x.strip())
+
+    # integer difficulty codes for sorting and comparing grades (see grades.py), then drop the "(approx)"
+    # the grades of boulder ascents are Font grades, a scale of their own
+    boulder = (df['style'] == 'Boulder').to_numpy()
+    official = encode_grades(df['official_grade'], boulder=boulder)
+    df['official_grade_code'] = official['grade_code']
+    df['official_grade_approx'] = official['grade_approx']
+    df['suggested_grade_code'] = encode_grades(df['suggested_grade'], boulder=boulder)['grade_code']
+    df['official_grade'] = strip_approx(df['official_grade'])
+
+    # parse the mixed date formats, each distinct string once, and keep how precise each date is
+    df[['parsed_date', 'date_precision']] = normalise_dates(df['ascent_date'])
+    return df
+
+
+def run_listing():
+    """Scrape the listing pages into the links and grades files, returns the new and changed links"""
+    state = CrawlState(CRAWL_STATE_PATH)
+    with stage('listing'):
+        return scrape_listing(state)
+
+
+def run_ascents(updated_links=None):
+    """Scrape the climbs of the links file and write the climbs and ascents datasets"""
+    state = CrawlState(CRAWL_STATE_PATH)
+    with open(LINKS_PATH, 'r', encoding='utf-8') as file:
+        all_climb_links = file.read().splitlines()
+    with open(GRADES_PATH, 'r', encoding='utf-8') as file:
+        all_grades = file.read().splitlines()
+    dict_grades = dict(zip(all_climb_links, all_grades))
+
+    #now parse all the links to extract the data tables
+    with stage('climbs'):
+        scrape_climbs(state, all_climb_links, updated_links)
+
+    with stage('tables'):
+        df = build_ascents_table(state.rows(all_climb_links), dict_grades)
+        boulder_links = set(df.loc[df['style'] == 'Boulder', 'link'])
+        write_dataset(build_climb_table(all_climb_links, all_grades,
+                                        boulder=[link in boulder_links for link in all_climb_links]), 'climbs')
+        write_dataset(df, 'ascents')
+        ClimberIndex.from_ascents(df).save() # climber and climb lookups, see climber_index.py
+    if EXPORT_EXCEL:
+        df.to_excel(data_path('climbing_history_all_23_02_2026.xlsx'), index = False)
+
+
+def main():
+    ### first find all the links for the individual pages of each climb
+    updated_links = run_listing()
+    ## now scrape info from all of the individual pages (only the updated ones in incremental mode)
+    run_ascents(updated_links)
+
+
+# the parser processes import this module, so the crawl only runs when it's executed as a script
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        export_metrics('scrape_climbing_history') # also for a failed run, see metrics.py
@@ -1,251 +1,141 @@
-import requests
-import numpy as np
-from bs4 import BeautifulSoup
-from tqdm import tqdm
+import os
 import pandas as pd
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
-from urllib.request import Request, urlopen
-import numpy as np
-import dateparser
-import re
-import geopandas
-from geodatasets import get_path
-import plotly.express as px
-import plotly.io as pio
-pio.renderers.default = 'browser'
-from geopy.geocoders import Nominatim
+
+from .config import LINKS_PATH, data_path, project_path
+from .crawler import crawl
+from .crag_locations import resolve_crags
+from .location_resolver import resolve_locations
+from .reverse_geocoder import countries_for
+from .route_clusters import write_clusters
+from .datasets import read_dataset, write_dataset, export_excel
+from .parsing import parse_climb_title
+from .climbs import climb_ids, with_climb_ids
+from .metrics import export_metrics, stage
+
+CONCURRENCY = 20 # max number of requests in flight
+WORKERS = os.cpu_count() # processes parsing the climb pages
+# the results are stored as parquet datasets, the excel copies are optional
+EXPORT_EXCEL = False
 
 #base url for the website
 base_url = "https://climbing-history.org"
 
-with open('../all_climb_links.txt', 'r', encoding='utf-8') as file:
-    all_climb_links = file.read().splitlines()
-with open('../all_grades.txt', 'r', encoding='utf-8') as file:
-    all_grades = file.read().splitlines()
-dict_grades = dict(zip(all_climb_links, all_grades))
-
-#now parse all the links to extract the data tables
-skipped_urls = []
-skipped_crag_links = []
-data_x = []
-data_y = []
-succesful_links = []
-
-# Configure retries
-retries = Retry(total=5, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-session = requests.Session()
-session.mount('https://', HTTPAdapter(max_retries=retries))
-
-for link in tqdm(all_climb_links):
-    target_name = link.split('/')[-1].split('-')[0].capitalize()
-    pattern = re.sub(r"([a-zA-Z])(['’]?)", r"\1['’]?", target_name)
-    url = base_url + link #the climb page's url
 
-    try:
-        response = session.get(url, timeout=10)
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching {url}: {e}")
-        skipped_urls.append(url)
-        continue  # Skip to the next URL
+def parse_title_response(url, status_code, text):
+    """(crag_link, external_link) of a climb page, None if the title can't be found (runs in the parser processes)"""
+    return parse_climb_title(text, url[len(base_url):])
 
-    # Parse the page with BeautifulSoup
-    soup = BeautifulSoup(response.text, 'html.parser')
 
-    # Try to get the link to the crag
-    try:
-        span = [span for span in soup.find_all("span") if re.match(f"^{pattern}", span.get_text(strip=True), re.IGNORECASE)][0]
-    except:
-        print(f"Error getting title for {link}")
-        skipped_urls.append(url)
-        continue  # Skip to the next URL
-    text = span.get_text(strip=True)
-    crag_link = span.find("a")
-    if crag_link:
-        crag_link = "https://climbing-history.org" + crag_link["href"]
-        try:
-            response_crag = session.get(crag_link, timeout=10)
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching {crag_link}: {e}")
-            skipped_crag_links.append(crag_link)
-            continue  # Skip to the next URL
-        soup = BeautifulSoup(response_crag.text, 'html.parser')
-        try:
-            map_script = [script.string for script in soup.find_all("script") if script.string and "L.map" in script.string][0]
-            marker_pattern = re.search(r"L\.marker\(\[(\-?\d+\.\d+),\s*(\-?\d+\.\d+)\]\)", map_script)
-            marker_coords = (float(marker_pattern.group(1)), float(marker_pattern.group(2))) if marker_pattern else None
-            marker_x, marker_y = marker_coords[0], marker_coords[1]
-            data_x.append(marker_x)
-            data_y.append(marker_y)
-            succesful_links.append(link)
-        except:
-            print(f"couldn't find map for {crag_link}")
-            skipped_crag_links.append(crag_link)
-            continue
+def find_climb_titles(links):
+    """Find the crag and external links of every climb, returns {link: (crag_link, external_link)} and the skipped urls"""
+    climb_titles = {}
 
-# Create a DataFrame
-df = pd.DataFrame(
-    {'link' : succesful_links, 'longitude' : data_y, 'latitude': data_x}
-)
-df['Route'] = df['link'].apply(lambda x: x.split("/")[-1])
-df.Route = df.Route.apply(lambda x: " ".join(word.capitalize() for word in x.split("-")))
-
-df_routes = pd.read_excel("c://data//climbing//climbing_history_all_cleanish.xlsx")
-df_comp = df_routes.merge(df, on = ['link', 'Route'], how = 'left')
-df_comp.to_excel("c://data//climbing//dataset_with_routes_location.xlsx", index = False)
-
-print(df_comp[~df_comp.Route.duplicated()].isna().sum())
-missing_links = df_comp[(~df_comp.Route.duplicated()) & (df_comp.latitude.isna())]['link_x'].tolist()
-with open('../links_for_which_i_couldnt_scrape_location.txt', 'w', encoding='utf-8') as file:
-    file.write("\n".join(missing_links))
-
-###########
-# try to find the missing locations
-###########
-
-# iteration 1
-succesful_links = []
-crag_names = []
-further_links = []
-location = []
-no_info_links = []
-
-for link in tqdm(missing_links):
-    target_name = link.split('/')[-1].split('-')[0].capitalize()
-    pattern = re.sub(r"([a-zA-Z])(['’]?)", r"\1['’]?", target_name)
-    url = base_url + link
+    def store_title(url, title):
+        if title is None:
+            print(f"Error getting title for {url[len(base_url):]}")
+        else:
+            climb_titles[url[len(base_url):]] = title
 
-    try:
-        response = session.get(url, timeout=10)
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching {url}: {e}")
-        skipped_urls.append(url)
-        continue  # Skip to the next URL
+    # all pages go through the shared page cache, so climb pages scraped by
+    # scrape_climbing_history.py are read from disk instead of downloaded again
+    urls = [base_url + link for link in links]
+    _, skipped_urls = crawl(urls, parse_title_response, write=store_title, concurrency=CONCURRENCY, workers=WORKERS)
+    return climb_titles, skipped_urls
 
-    # Parse the page with BeautifulSoup
-    soup = BeautifulSoup(response.text, 'html.parser')
 
-    # Try to get the link to the crag
-    try:
-        span = [span for span in soup.find_all("span") if re.match(f"^{pattern}", span.get_text(strip=True), re.IGNORECASE)][0]
-    except:
-        print(f"Error getting title for {link}")
-        skipped_urls.append(url)
-        continue  # Skip to the next URL
-    text = span.get_text(strip=True)
-    crag_link = span.find("a")
-    if not crag_link: ## there's no link in the page title
-        try: # try to go to 8a.nu
-            nu_link = soup.find("a", {'class': 'text-break text-muted small'}).get('href')
-            further_links.append(nu_link)
-            succesful_links.append(link)
-            crag_names.append("")
-            location.append("")
-            continue
-        except:
-            print(f"couldn't find link for {url}, nor its says location")
-            no_info_links.append(link)
+def main():
+    with open(LINKS_PATH, 'r', encoding='utf-8') as file:
+        all_climb_links = file.read().splitlines()
+
+    #now parse all the links to extract the data tables
+    skipped_crag_links = []
+    data_x = []
+    data_y = []
+    succesful_links = []
+
+    # first find the crag of every route
+    with stage('climb_titles'):
+        climb_titles, skipped_urls = find_climb_titles(all_climb_links)
+    if skipped_urls:
+        print(f"Skipped urls: {skipped_urls}")
+
+    # then resolve each distinct crag once (and remember it between runs) ...
+    with stage('crags'):
+        crags = resolve_crags([crag_link for crag_link, _ in climb_titles.values() if crag_link], workers=WORKERS)
+
+    # ... and fan the crag locations back out to the routes
+    for link, (crag_link, _) in climb_titles.items():
+        if not crag_link:
             continue
-    else:
-        crag_link = "https://climbing-history.org" + crag_link["href"]
-        try:
-            response_crag = session.get(crag_link, timeout=10)
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching {crag_link}: {e}")
+        crag = crags.get(crag_link)
+        if crag is None:
             skipped_crag_links.append(crag_link)
-            continue  # Skip to the next URL
-        soup = BeautifulSoup(response_crag.text, 'html.parser')
-        crag_name = soup.find("title").get_text(strip=True)
-        try:
-            map_script = [script.string for script in soup.find_all("script") if script.string and "L.map" in script.string][0]
-            marker_pattern = re.search(r"L\.marker\(\[(\-?\d+\.\d+),\s*(\-?\d+\.\d+)\]\)", map_script)
-            marker_coords = (float(marker_pattern.group(1)), float(marker_pattern.group(2))) if marker_pattern else None
-            further_links.append("")
-            succesful_links.append(link)
-            crag_names.append(crag_name)
-            location.append(marker_coords)
-        except:
+            continue
+        if crag['latitude'] is None:
             print(f"couldn't find map for {crag_link}")
-            try:  # try to go to climbinguk
-                cluk_link = soup.find("a", {'class': 'text-break text-muted small'}).get('href') + "/#maps"
-                try:
-                    response_crag = session.get(cluk_link, timeout=10)
-                    soup = BeautifulSoup(response_crag.text, 'html.parser')
-                    latitude = soup.find("meta", {'property' : 'place:location:latitude'}).get('content')
-                    longitude = soup.find("meta", {'property': 'place:location:longitude'}).get('content')
-                    coords = [latitude, longitude]
-                    further_links.append(cluk_link)
-                    succesful_links.append(link)
-                    crag_names.append(crag_name)
-                    location.append(coords)
-                except requests.exceptions.RequestException as e:
-                    print(f"Error fetching {crag_link}: {e}")
-                    further_links.append(cluk_link)
-                    succesful_links.append(link)
-                    crag_names.append(crag_name)
-                    location.append("")
-                    continue  # Skip to the next URL
-            except:
-                continue
-
-df_missing = pd.DataFrame({'link' : succesful_links,
-    'crag_name' : crag_names,
-    'further_link' : further_links,
-    'location' : location})
-df_missing.loc[df_missing.location != '','latitude'] = df_missing.loc[df_missing.location != '','location'].apply(lambda x: float(x[0]))
-df_missing.loc[df_missing.location != '','longitude'] = df_missing.loc[df_missing.location != '','location'].apply(lambda x: float(x[1]))
-
-df_missing[df_missing.latitude.isna()].to_excel("c://data//climbing//links_for_missing_routes.xlsx", index = False)
-
-## add the places for which we could get a location
-df = pd.read_excel("c://data//climbing//dataset_with_routes_location.xlsx")
-
-df_comp = df.merge(df_missing[['link', 'latitude', 'longitude']], on = 'link', how = 'left')
-df_comp.loc[df_comp.latitude_x.isna(), 'latitude_x'] = df_comp.loc[df_comp.latitude_x.isna(), 'latitude_y']
-df_comp.loc[df_comp.latitude_x.isna(), 'longitude_x'] = df_comp.loc[df_comp.latitude_x.isna(), 'longitude_y']
-df_comp.rename(columns = {'latitude_x' : 'latitude', 'longitude_x' : 'longitude'}, inplace = True)
-df_comp.drop(columns = {'latitude_y', 'longitude_y'}, inplace = True)
-df_comp.to_excel("c://data//climbing//dataset_with_routes_location.xlsx", index = False)
-
-
-### try scrping the rest of the nu8 links
-
-nu_links = [x for x in df_missing.further_link.tolist() if '8a.nu' in x]
-no_success = []
-titles = []
-
-for link in tqdm(nu_links):
+            skipped_crag_links.append(crag_link)
+            continue
+        data_x.append(crag['latitude'])
+        data_y.append(crag['longitude'])
+        succesful_links.append(link)
+
+    # Create a DataFrame
+    df = pd.DataFrame(
+        {'link' : succesful_links, 'longitude' : data_y, 'latitude': data_x}
+    )
+    df['climb_id'] = climb_ids(df['link'])
+
+    # the hand cleaned ascents, stored with import_excel("...climbing_history_all_cleanish.xlsx", 'ascents_clean')
+    # all the joins are on the integer climb_id (routes sharing a name are different climbs)
+    df_routes = with_climb_ids(read_dataset('ascents_clean'))
+    df_comp = df_routes.merge(df[['climb_id', 'longitude', 'latitude']], on = 'climb_id', how = 'left')
+    write_dataset(df_comp, 'routes_location')
+
+    print(df_comp[~df_comp.climb_id.duplicated()].isna().sum())
+    missing_links = df_comp[(~df_comp.climb_id.duplicated()) & (df_comp.latitude.isna())]['link'].tolist()
+    with open(project_path('links_for_which_i_couldnt_scrape_location.txt'), 'w', encoding='utf-8') as file:
+        file.write("\n".join(missing_links))
+
+    ###########
+    # try to find the missing locations
+    ###########
+
+    # crag map -> UKC map page -> 8a.nu title, all routes at once with per site limits,
+    # each route stops at the first source that answers
+    with stage('missing_locations'):
+        df_missing = with_climb_ids(resolve_locations(missing_links, climb_titles, crags))
+    print(f"Locations found by source: {df_missing.location_source.value_counts().to_dict()}")
+    write_dataset(df_missing[df_missing.latitude.isna()], 'missing_routes')
+
+    ## add the places for which we could get a location
+    df_comp = df_comp.merge(df_missing[['climb_id', 'latitude', 'longitude']], on = 'climb_id', how = 'left')
+    df_comp.loc[df_comp.latitude_x.isna(), 'latitude_x'] = df_comp.loc[df_comp.latitude_x.isna(), 'latitude_y']
+    df_comp.loc[df_comp.longitude_x.isna(), 'longitude_x'] = df_comp.loc[df_comp.longitude_x.isna(), 'longitude_y']
+    df_comp.rename(columns = {'latitude_x' : 'latitude', 'longitude_x' : 'longitude'}, inplace = True)
+    df_comp.drop(columns = {'latitude_y', 'longitude_y'}, inplace = True)
+    write_dataset(df_comp, 'routes_location')
+
+    df = df_comp.merge(df_missing[['climb_id', 'further_link', 'inferred_country', 'title', 'location_source']],
+                       on = 'climb_id', how = 'left')
+
+    # the country of every route with coordinates (overrides the one from the 8a.nu title),
+    # only coordinates that weren't looked up on a previous run are tested against the countries
+    has_location = df.latitude.notna()
+    with stage('countries'):
+        countries = countries_for(df.loc[has_location, 'latitude'], df.loc[has_location, 'longitude'])
+    df.loc[has_location, 'inferred_country'] = pd.Series(countries, index=df.index[has_location]).fillna(
+        df.loc[has_location, 'inferred_country'])
+
+    write_dataset(df, 'routes_location')
+    write_clusters() # the map's clusters of the located routes
+    if EXPORT_EXCEL:
+        export_excel('routes_location', data_path('dataset_with_routes_location.xlsx'))
+        export_excel('missing_routes', data_path('links_for_missing_routes.xlsx'))
+
+
+# the parser processes import this module, so the scraping only runs when it's executed as a script
+if __name__ == "__main__":
     try:
-        req = Request(
-            url=link,
-            headers={'User-Agent': 'Mozilla/5.0'}
-        )
-        soup = BeautifulSoup(urlopen(req).read(), 'html.parser')
-        title = soup.find("title").get_text()
-        titles.append(title)
-    except:
-        titles.append("")
-        no_success.append(link)
-
-df_nu = pd.DataFrame({'further_link' : nu_links, 'title' : titles})
-df_missing = df_missing.merge(df_nu, on = 'further_link', how = 'left')
-df_missing.loc[df_missing.title != "", 'inferred_country'] = (
-    df_missing.loc[(~df_missing.title.isna()) & (df_missing.title != ""), 'title']
-    .apply(lambda x: x.split(',')[1].split('-')[0].strip()))
-
-df = df.merge(df_missing[['link', 'further_link', 'inferred_country', 'title']], on = 'link', how = 'left')
-
-import geopandas
-gdf = geopandas.GeoDataFrame(df, geometry=geopandas.points_from_xy(df.longitude, df.latitude),
-                             crs = 'EPSG:4326')
-gdf = gdf[(~gdf.latitude.isna()) & (~gdf.Route.duplicated())]
-world = geopandas.read_file("C:\\Data\\geo\\admin_0\\ne_110m_admin_0_countries.shp")
-
-gdf = gdf.sjoin(world[['ADMIN', 'geometry']], how = 'left')
-gdf = gdf[gdf['ADMIN'] != ""]
-dict_routes_countries = dict(zip(gdf.Route.tolist(), gdf.ADMIN.tolist()))
-
-df.loc[df.Route.isin(dict_routes_countries.keys()), 'inferred_country'] = (
-    df.loc[df.Route.isin(dict_routes_countries.keys()), 'Route'].map(dict_routes_countries))
-
-df.to_excel("c://data//climbing//dataset_with_routes_location.xlsx", index = False)
+        main()
+    finally:
+        export_metrics('scrape_route_locations') # also for a failed run, see metrics.py
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from climbing_history.ifsc.browser_pool import BrowserPool
+
+
+class FakeDriver:
+    """Stands in for a selenium driver: every page renders at once (or after delay), links in
+    fail_on raise on their first fail_on[link] loads. Every load is logged as (link, thread name, ok)."""
+
+    def __init__(self, log, fail_on=None, delay=0.0):
+        self.log = log
+        self.fail_on = fail_on if fail_on is not None else {}
+        self.delay = delay
+        self.page_source = None
+
+    def get(self, url):
+        time.sleep(self.delay)
+        failing = self.fail_on.get(url, 0) > 0
+        self.log.append((url, threading.current_thread().name, not failing))
+        if failing:
+            self.fail_on[url] -= 1
+            raise RuntimeError(f"can't load {url}")
+        self.page_source = f"<html><div class='r-name'>{url}</div></html>"
+
+    def find_element(self, by, value):
+        return self.page_source
+
+    def quit(self):
+        pass
+
+
+def make_pool(log, n_workers=3, **driver_options):
+    shared = dict(driver_options)
+    return BrowserPool(n_workers=n_workers, pages_per_browser=5, max_attempts=3, wait_timeout=1,
+                       make_driver=lambda: FakeDriver(log, **shared))
+
+
+def test_renders_every_link_in_order_with_one_worker():
+    links = [f"page-{i}" for i in range(12)]
+    results = list(make_pool([], n_workers=1).render(links))
+    assert [link for link, _ in results] == links
+    assert all(link in page_source for link, page_source in results)
+
+
+def test_renders_every_link_once_with_several_workers():
+    log = []
+    links = [f"page-{i}" for i in range(30)]
+    results = dict(make_pool(log).render(links))
+    assert sorted(results) == sorted(links)
+    assert all(results[link] is not None for link in links)
+    assert len(log) == len(links)
+
+
+def test_failed_page_is_retried_on_a_different_worker():
+    log = []
+    fail_on = {'page-3': 1}
+    results = dict(make_pool(log, fail_on=fail_on).render([f"page-{i}" for i in range(10)]))
+    assert 'page-3' in results['page-3']
+    loads = [(thread, ok) for link, thread, ok in log if link == 'page-3']
+    assert [ok for _, ok in loads] == [False, True]
+    assert loads[0][0] != loads[1][0]
+
+
+def test_page_gives_up_after_max_attempts():
+    log = []
+    results = dict(make_pool(log, fail_on={'page-1': 10}).render([f"page-{i}" for i in range(4)]))
+    assert results['page-1'] is None
+    assert sum(1 for link, _, _ in log if link == 'page-1') == 3
+    assert all(results[f"page-{i}"] is not None for i in (0, 2, 3))
+
+
+def test_closing_early_does_not_render_the_remaining_pages():
+    log = []
+    pages = make_pool(log, n_workers=2, delay=0.1).render([f"page-{i}" for i in range(41)])
+    for _, (link, page_source) in zip(range(3), pages):
+        assert page_source is not None
+    start = time.perf_counter()
+    pages.close()
+    assert time.perf_counter() - start < 1
+    assert len(log) < 10